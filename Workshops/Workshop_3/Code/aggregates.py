@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+
+# Columnas numéricas con media, varianza y covarianza en línea (mismo orden del heatmap)
+NUMERIC_COLUMNS = ['rounds', 'total_time', 'q_mu', 'a_mu', 'questions_asked']
+# Traza por cubetas de juegos consecutivos: medias ponderadas por 'count' y envolvente min/max
+TRACE_MEANS = ['rounds', 'q_mu', 'q_sigma', 'a_mu']
+TRACE_ENVELOPES = ['q_mu', 'a_mu']
+TRACE_COLUMNS = (['game', 'count'] + TRACE_MEANS +
+                 [f'{name}_{bound}' for name in TRACE_ENVELOPES for bound in ('min', 'max')])
+SKILL_BIN = 10  # Ancho de las celdas de habilidad del histograma 2D rondas x q_mu
+INPUT_COLUMNS = ['scenario', 'category', 'status', 'q_sigma'] + NUMERIC_COLUMNS
+# Columnas que pueden faltar: sin ellas no hay tablas por escenario o categoría
+OPTIONAL_COLUMNS = ['scenario', 'category']
+
+class OnlineAggregator:
+    """Resumen en línea de los resultados con memoria O(1) en número de juegos
+
+    Tiene la misma interfaz que ResultsBuffer (append, extend, merge), así
+    que la simulación puede escribir aquí en lugar de guardar cada juego.
+    Media y covarianza se combinan por bloques con la forma de Chan de
+    Welford; además lleva conteos por escenario, categoría y estado, un
+    histograma de rondas, un histograma 2D rondas x habilidad y una traza
+    de a lo sumo trace_size cubetas (media y min/max) para los gráficos.
+    """
+
+    def __init__(self, flush_size=4096, trace_size=4096):
+        self.flush_size = flush_size
+        self.trace_size = trace_size
+        self.n = 0
+        self.mean = np.zeros(len(NUMERIC_COLUMNS))
+        self.comoment = np.zeros((len(NUMERIC_COLUMNS), len(NUMERIC_COLUMNS)))
+        self.status_counts = {}
+        self.scenarios = {}   # escenario -> [juegos, éxitos, suma rondas, suma tiempo]
+        self.categories = {}  # categoría -> [juegos, éxitos, suma rondas]
+        self.rounds_hist = np.zeros(0, dtype=np.int64)
+        self.skill_hist = {}  # (rondas, celda de q_mu) -> juegos
+        self.trace = {name: np.empty(0) for name in TRACE_COLUMNS}
+        self.trace_stride = 1
+        self._pending = {name: [] for name in INPUT_COLUMNS}
+
+    def __len__(self):
+        return self.n + len(self._pending['rounds'])
+
+    @classmethod
+    def from_dataframe(cls, results_df):
+        aggregator = cls()
+        aggregator.extend({name: results_df[name].to_numpy() for name in INPUT_COLUMNS
+                           if name in results_df.columns or name not in OPTIONAL_COLUMNS})
+        return aggregator
+
+    def append(self, **row):
+        """Agrega un juego; se acumula y se procesa por bloques de flush_size"""
+        for name, values in self._pending.items():
+            values.append(row[name])
+        if len(self._pending['rounds']) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Procesa los juegos pendientes de append"""
+        if self._pending['rounds']:
+            pending = {name: np.array(values, dtype=object if name in ('scenario', 'category', 'status')
+                                      else float)
+                       for name, values in self._pending.items()}
+            self._pending = {name: [] for name in INPUT_COLUMNS}
+            self.extend(pending)
+
+    def extend(self, columns):
+        """Agrega un bloque de juegos dado como diccionario de arreglos"""
+        rounds = np.asarray(columns['rounds'])
+        m = len(rounds)
+        if m == 0:
+            return
+        status = np.asarray(columns['status'], dtype=object)
+        success = status == 'success'
+        total_time = np.asarray(columns['total_time'], dtype=float)
+        start = self.n
+
+        # Media y co-momentos (Chan et al.: combinación de dos grupos de Welford)
+        block = np.column_stack([np.asarray(columns[name], dtype=float) for name in NUMERIC_COLUMNS])
+        block_mean = block.mean(axis=0)
+        centered = block - block_mean
+        self._combine(m, block_mean, centered.T @ centered)
+
+        values, counts, _ = _unique_in_order(status)
+        for value, count in zip(values, counts):
+            self.status_counts[value] = self.status_counts.get(value, 0) + count
+
+        scenario = columns.get('scenario')
+        if scenario is not None:
+            if np.ndim(scenario) == 0:
+                scenario = np.full(m, scenario, dtype=object)
+            _accumulate(self.scenarios, scenario, success, rounds, total_time)
+        if columns.get('category') is not None:
+            _accumulate(self.categories, np.asarray(columns['category'], dtype=object),
+                        success, rounds)
+
+        counts = np.bincount(rounds.astype(np.int64))
+        if len(counts) > len(self.rounds_hist):
+            self.rounds_hist = np.pad(self.rounds_hist, (0, len(counts) - len(self.rounds_hist)))
+        self.rounds_hist[:len(counts)] += counts
+
+        q_mu = np.asarray(columns['q_mu'], dtype=float)
+        # Celda (rondas, q_mu // SKILL_BIN) empaquetada en un solo entero
+        skill_bins = np.floor(q_mu / SKILL_BIN).astype(np.int64) + 2**31
+        cells, counts, _ = _unique_in_order((rounds.astype(np.int64) << 32) | skill_bins)
+        for cell, count in zip(cells, counts):
+            key = (int(cell) >> 32, (int(cell) & 0xFFFFFFFF) - 2**31)
+            self.skill_hist[key] = self.skill_hist.get(key, 0) + count
+
+        trace = {'game': np.arange(start, start + m, dtype=float), 'count': np.ones(m)}
+        for name in TRACE_MEANS:
+            trace[name] = np.asarray(columns[name], dtype=float)
+        for name in TRACE_ENVELOPES:
+            trace[f'{name}_min'] = trace[f'{name}_max'] = trace[name]
+        self._add_trace(trace)
+
+    def _combine(self, m, block_mean, block_comoment):
+        n = self.n + m
+        delta = block_mean - self.mean
+        self.comoment += block_comoment + np.outer(delta, delta) * (self.n * m / n)
+        self.mean += delta * (m / n)
+        self.n = n
+
+    def _add_trace(self, trace):
+        """Agrega cubetas a la traza; si pasa de trace_size se duplica el ancho"""
+        self.trace = _rebucket({name: np.concatenate([self.trace[name], trace[name]])
+                                for name in TRACE_COLUMNS}, self.trace_stride)
+        while len(self.trace['game']) > self.trace_size:
+            self.trace_stride *= 2
+            self.trace = _rebucket(self.trace, self.trace_stride)
+
+    def merge(self, other):
+        """Agrega otro agregador (p.ej. de un proceso o fragmento) a continuación"""
+        self.flush()
+        other.flush()
+        if other.n == 0:
+            return
+        start = self.n
+        self._combine(other.n, other.mean, other.comoment)
+
+        for value, count in other.status_counts.items():
+            self.status_counts[value] = self.status_counts.get(value, 0) + count
+        for table, other_table in ((self.scenarios, other.scenarios), (self.categories, other.categories)):
+            for key, entry in other_table.items():
+                totals = table.setdefault(key, [0] * len(entry))
+                for i, value in enumerate(entry):
+                    totals[i] += value
+
+        if len(other.rounds_hist) > len(self.rounds_hist):
+            self.rounds_hist = np.pad(self.rounds_hist, (0, len(other.rounds_hist) - len(self.rounds_hist)))
+        self.rounds_hist[:len(other.rounds_hist)] += other.rounds_hist
+        for cell, count in other.skill_hist.items():
+            self.skill_hist[cell] = self.skill_hist.get(cell, 0) + count
+
+        trace = dict(other.trace)
+        trace['game'] = trace['game'] + start
+        self._add_trace(trace)
+
+    def std(self, name):
+        """Desviación estándar muestral (ddof=1, como pandas)"""
+        self.flush()
+        i = NUMERIC_COLUMNS.index(name)
+        return float(np.sqrt(self.comoment[i, i] / (self.n - 1))) if self.n > 1 else float('nan')
+
+    def mean_of(self, name):
+        self.flush()
+        return float(self.mean[NUMERIC_COLUMNS.index(name)]) if self.n else float('nan')
+
+    def rate(self, status):
+        self.flush()
+        return self.status_counts.get(status, 0) / self.n if self.n else float('nan')
+
+    def correlation(self):
+        """Matriz de correlación de NUMERIC_COLUMNS a partir de los co-momentos"""
+        self.flush()
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=NUMERIC_COLUMNS, columns=NUMERIC_COLUMNS)
+
+    def scenario_table(self):
+        """Tasa de éxito, rondas y tiempo promedio por escenario"""
+        self.flush()
+        return pd.DataFrame(
+            [[s / g, r / g, t / g] for g, s, r, t in self.scenarios.values()],
+            index=pd.Index(list(self.scenarios), name='scenario'),
+            columns=['Tasa_Éxito', 'Rondas_Promedio', 'Tiempo_Promedio'])
+
+    def category_table(self):
+        """Tasa de éxito y rondas promedio por categoría"""
+        self.flush()
+        return pd.DataFrame(
+            [[s / g, r / g] for g, s, r in self.categories.values()],
+            index=pd.Index(list(self.categories), name='category'),
+            columns=['Tasa_Éxito', 'Rondas_Promedio'])
+
+    def summary(self):
+        """Mismo diccionario que devuelve analyze_results"""
+        return {
+            'total_games': len(self),
+            'success_rate': self.rate('success'),
+            'avg_rounds': self.mean_of('rounds'),
+            'chaos_indicators': {
+                'rounds_std': self.std('rounds'),
+                'skill_variation_q': self.std('q_mu'),
+                'skill_variation_a': self.std('a_mu')
+            }
+        }
+
+def _rebucket(trace, stride):
+    """Une las cubetas cuyo primer juego cae en la misma ventana de 'stride' juegos"""
+    ids = trace['game'] // stride
+    if len(ids) < 2 or (ids[1:] != ids[:-1]).all():
+        return trace
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    count = np.add.reduceat(trace['count'], starts)
+    merged = {'game': trace['game'][starts], 'count': count}
+    for name in TRACE_MEANS:
+        merged[name] = np.add.reduceat(trace[name] * trace['count'], starts) / count
+    for name in TRACE_ENVELOPES:
+        merged[f'{name}_min'] = np.minimum.reduceat(trace[f'{name}_min'], starts)
+        merged[f'{name}_max'] = np.maximum.reduceat(trace[f'{name}_max'], starts)
+    return merged
+
+def _unique_in_order(values):
+    """Valores únicos en orden de primera aparición, sus conteos y el código de cada fila
+
+    Los faltantes (NaN/None) tienen código -1 y no se cuentan, como en groupby.
+    """
+    codes, uniques = pd.factorize(values)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    return list(uniques), counts.tolist(), codes
+
+def _accumulate(table, keys, success, *sums):
+    """Suma juegos, éxitos y las columnas en sums por cada clave"""
+    uniques, counts, codes = _unique_in_order(keys)
+    present = codes >= 0
+    codes = codes[present]
+    totals = [np.bincount(codes, weights=success[present], minlength=len(uniques))] + \
+             [np.bincount(codes, weights=np.asarray(values, dtype=float)[present], minlength=len(uniques))
+              for values in sums]
+    for i, (key, count) in enumerate(zip(uniques, counts)):
+        entry = table.setdefault(key, [0] * (2 + len(sums)))
+        entry[0] += count
+        for j, column in enumerate(totals, 1):
+            entry[j] += column[i].item()
@@ -1,25 +1,57 @@
+import os
 import matplotlib
 matplotlib.use('Agg')  # Backend sin GUI
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-
-def analyze_results(results_df, save_plots=True):
-    """Análisis completo de resultados con visualizaciones"""
+from instrumentation import timed
+from aggregates import OnlineAggregator, INPUT_COLUMNS, SKILL_BIN
+from results_io import iter_results
+
+def aggregate_results_file(path, filters=None):
+    """OnlineAggregator desde resultados guardados con write_results
+
+    Lee solo las columnas que usa el análisis, de a bloques y aplicando
+    filters (p.ej. [('scenario', 'in', ['balanced'])]) al leer.
+    """
+    aggregates = OnlineAggregator()
+    for chunk in iter_results(path, columns=INPUT_COLUMNS, filters=filters):
+        aggregates.extend({name: chunk[name].to_numpy() for name in INPUT_COLUMNS})
+    return aggregates
+
+@timed('analyze_results')
+def analyze_results(results, save_plots=True, filters=None, **plot_options):
+    """Análisis completo de resultados con visualizaciones
+
+    results puede ser el DataFrame de resultados, un OnlineAggregator
+    llenado durante la simulación o la ruta de resultados guardados con
+    write_results (se leen con proyección de columnas y filters); en todos
+    los casos el análisis sale de los agregados, sin recorrer cada juego
+    más de una vez. plot_options se pasan a create_plots (fast, dpi, fmt,
+    max_points, filename).
+    """
 
     print("\n" + "="*60)
     print("ANÁLISIS DE RESULTADOS")
     print("="*60)
 
-    if len(results_df) == 0:
+    if isinstance(results, (str, os.PathLike)):
+        aggregates = aggregate_results_file(results, filters)
+    elif isinstance(results, OnlineAggregator):
+        aggregates = results
+    else:
+        aggregates = OnlineAggregator.from_dataframe(results)
+
+    if len(aggregates) == 0:
         print("❌ No hay datos para analizar")
         return
+    summary = aggregates.summary()
 
     # Estadísticas generales
-    total_games = len(results_df)
-    success_rate = (results_df['status'] == 'success').mean()
-    timeout_rate = (results_df['status'] == 'timeout').mean()
-    avg_rounds = results_df['rounds'].mean()
+    total_games = summary['total_games']
+    success_rate = summary['success_rate']
+    timeout_rate = aggregates.rate('timeout')
+    avg_rounds = summary['avg_rounds']
 
     print(f"📊 ESTADÍSTICAS GENERALES:")
     print(f"   Total de juegos: {total_games}")
@@ -28,30 +60,22 @@ def analyze_results(results_df, save_plots=True):
     print(f"   Rondas promedio: {avg_rounds:.2f}")
 
     # Análisis por escenario
-    if 'scenario' in results_df.columns:
-        scenario_stats = results_df.groupby('scenario').agg({
-            'status': lambda x: (x == 'success').mean(),
-            'rounds': 'mean',
-            'total_time': 'mean'
-        }).round(3)
-        scenario_stats.columns = ['Tasa_Éxito', 'Rondas_Promedio', 'Tiempo_Promedio']
+    if aggregates.scenarios:
+        scenario_stats = aggregates.scenario_table().round(3)
         print(f"\n📈 ANÁLISIS POR ESCENARIO:")
         print(scenario_stats)
 
     # Análisis por categoría
-    if 'category' in results_df.columns:
-        category_stats = results_df.groupby('category').agg({
-            'status': lambda x: (x == 'success').mean(),
-            'rounds': 'mean'
-        }).sort_values('status', ascending=False).head(10)
-        category_stats.columns = ['Tasa_Éxito', 'Rondas_Promedio']
+    if aggregates.categories:
+        category_stats = aggregates.category_table().sort_values('Tasa_Éxito', ascending=False).head(10)
         print(f"\n🎯 TOP 10 CATEGORÍAS (por tasa de éxito):")
         print(category_stats.round(3))
 
     # Detección de comportamiento caótico
-    rounds_std = results_df['rounds'].std()
-    skill_variation_q = results_df['q_mu'].std()
-    skill_variation_a = results_df['a_mu'].std()
+    chaos = summary['chaos_indicators']
+    rounds_std = chaos['rounds_std']
+    skill_variation_q = chaos['skill_variation_q']
+    skill_variation_a = chaos['skill_variation_a']
 
     print(f"\n🌪️  ANÁLISIS DE CAOS:")
     print(f"   Variabilidad en rondas: {rounds_std:.2f}")
@@ -65,21 +89,50 @@ def analyze_results(results_df, save_plots=True):
 
     # Crear visualizaciones
     if save_plots:
-        create_plots(results_df)
-
-    return {
-        'total_games': total_games,
-        'success_rate': success_rate,
-        'avg_rounds': avg_rounds,
-        'chaos_indicators': {
-            'rounds_std': rounds_std,
-            'skill_variation_q': skill_variation_q,
-            'skill_variation_a': skill_variation_a
-        }
-    }
-
-def create_plots(results_df):
-    """Crea visualizaciones completas"""
+        create_plots(aggregates, **plot_options)
+
+    return summary
+
+# A partir de cuántos juegos create_plots usa el modo rápido por defecto
+FAST_PLOT_THRESHOLD = 20000
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: reduce una serie a n_out puntos conservando su forma"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.asarray(x), np.asarray(y)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Promedio de la cubeta siguiente como tercer vértice del triángulo
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+@timed('create_plots')
+def create_plots(aggregates, fast=None, dpi=300, fmt='png', max_points=1000,
+                 filename='simulation_comprehensive_analysis'):
+    """Crea visualizaciones completas a partir de un OnlineAggregator
+
+    En modo rápido (por defecto desde FAST_PLOT_THRESHOLD juegos) la
+    evolución de habilidades se reduce con LTTB a max_points puntos con su
+    envolvente min/max, y el scatter se reemplaza por el histograma 2D
+    precalculado, así el tiempo de dibujo no crece con la cantidad de
+    juegos.
+    """
+    if fast is None:
+        fast = len(aggregates) >= FAST_PLOT_THRESHOLD
 
     # Configurar estilo
     plt.style.use('default')
@@ -90,13 +143,23 @@ def create_plots(results_df):
 
     # 1. Evolución de habilidades
     plt.subplot(2, 3, 1)
-    if len(results_df) > 1:
-        plt.plot(results_df['q_mu'].values, label='Questioner (μ)', alpha=0.7, linewidth=2)
-        plt.plot(results_df['a_mu'].values, label='Answerer (μ)', alpha=0.7, linewidth=2)
-        plt.fill_between(range(len(results_df)),
-                         results_df['q_mu'] - results_df['q_sigma'],
-                         results_df['q_mu'] + results_df['q_sigma'],
-                         alpha=0.2)
+    trace = aggregates.trace
+    if len(aggregates) > 1:
+        if fast:
+            plt.plot(*lttb(trace['game'], trace['q_mu'], max_points), label='Questioner (μ)',
+                     alpha=0.7, linewidth=1)
+            plt.plot(*lttb(trace['game'], trace['a_mu'], max_points), label='Answerer (μ)',
+                     alpha=0.7, linewidth=1)
+            # Envolvente min/max de cada cubeta de juegos
+            plt.fill_between(trace['game'], trace['q_mu_min'], trace['q_mu_max'], alpha=0.2)
+            plt.fill_between(trace['game'], trace['a_mu_min'], trace['a_mu_max'], alpha=0.2)
+        else:
+            plt.plot(trace['game'], trace['q_mu'], label='Questioner (μ)', alpha=0.7, linewidth=2)
+            plt.plot(trace['game'], trace['a_mu'], label='Answerer (μ)', alpha=0.7, linewidth=2)
+            plt.fill_between(trace['game'],
+                             trace['q_mu'] - trace['q_sigma'],
+                             trace['q_mu'] + trace['q_sigma'],
+                             alpha=0.2)
     plt.title('Evolución de Habilidades', fontsize=12, fontweight='bold')
     plt.xlabel('Número de Juego')
     plt.ylabel('Puntuación de Habilidad')
@@ -105,20 +168,29 @@ def create_plots(results_df):
 
     # 2. Distribución de resultados
     plt.subplot(2, 3, 2)
-    if 'status' in results_df.columns:
-        status_counts = results_df['status'].value_counts()
-        colors = ['#2ecc71', '#e74c3c', '#f39c12'][:len(status_counts)]
-        plt.bar(status_counts.index, status_counts.values, color=colors)
-        plt.title('Distribución de Resultados', fontsize=12, fontweight='bold')
-        plt.ylabel('Cantidad de Juegos')
-        for i, v in enumerate(status_counts.values):
-            plt.text(i, v + 0.5, str(v), ha='center', fontweight='bold')
+    status_counts = sorted(aggregates.status_counts.items(), key=lambda item: -item[1])
+    colors = ['#2ecc71', '#e74c3c', '#f39c12'][:len(status_counts)]
+    plt.bar([status for status, _ in status_counts], [v for _, v in status_counts], color=colors)
+    plt.title('Distribución de Resultados', fontsize=12, fontweight='bold')
+    plt.ylabel('Cantidad de Juegos')
+    for i, (_, v) in enumerate(status_counts):
+        plt.text(i, v + 0.5, str(v), ha='center', fontweight='bold')
 
     # 3. Comportamiento caótico
     plt.subplot(2, 3, 3)
-    if len(results_df) > 10:
-        scatter = plt.scatter(results_df['rounds'], results_df['q_mu'],
-                              c=range(len(results_df)), cmap='viridis', alpha=0.6, s=30)
+    if fast and aggregates.skill_hist:
+        # Histograma 2D rondas x habilidad ya acumulado: celdas alineadas a las del agregador
+        cells = np.array(list(aggregates.skill_hist))
+        counts = np.fromiter(aggregates.skill_hist.values(), dtype=float)
+        skill_step = int(np.ceil((np.ptp(cells[:, 1]) + 1) / 60))  # a lo sumo ~60 filas
+        round_edges = np.arange(cells[:, 0].min(), cells[:, 0].max() + 2) - 0.5
+        skill_edges = np.arange(cells[:, 1].min(), cells[:, 1].max() + skill_step + 1, skill_step) * SKILL_BIN
+        *_, image = plt.hist2d(cells[:, 0], cells[:, 1] * SKILL_BIN, bins=[round_edges, skill_edges],
+                               weights=counts, cmap='viridis', cmin=1)
+        plt.colorbar(image, label='Juegos')
+    elif len(aggregates) > 10:
+        scatter = plt.scatter(trace['rounds'], trace['q_mu'],
+                              c=trace['game'], cmap='viridis', alpha=0.6, s=30)
         plt.colorbar(scatter, label='Número de Juego')
     plt.title('Comportamiento Caótico', fontsize=12, fontweight='bold')
     plt.xlabel('Rondas Jugadas')
@@ -127,9 +199,13 @@ def create_plots(results_df):
 
     # 4. Distribución de rondas
     plt.subplot(2, 3, 4)
-    plt.hist(results_df['rounds'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-    plt.axvline(results_df['rounds'].mean(), color='red', linestyle='--', linewidth=2,
-                label=f'Media: {results_df["rounds"].mean():.1f}')
+    # Histograma desde los conteos por número de rondas
+    rounds_values = np.flatnonzero(aggregates.rounds_hist)
+    avg_rounds = aggregates.mean_of('rounds')
+    plt.hist(rounds_values, bins=20, weights=aggregates.rounds_hist[rounds_values],
+             alpha=0.7, color='skyblue', edgecolor='black')
+    plt.axvline(avg_rounds, color='red', linestyle='--', linewidth=2,
+                label=f'Media: {avg_rounds:.1f}')
     plt.title('Distribución de Rondas por Juego', fontsize=12, fontweight='bold')
     plt.xlabel('Número de Rondas')
     plt.ylabel('Frecuencia')
@@ -138,10 +214,8 @@ def create_plots(results_df):
 
     # 5. Rendimiento por escenario
     plt.subplot(2, 3, 5)
-    if 'scenario' in results_df.columns and len(results_df['scenario'].unique()) > 1:
-        scenario_success = results_df.groupby('scenario')['status'].apply(
-            lambda x: (x == 'success').mean()
-        ).sort_values(ascending=False)
+    if len(aggregates.scenarios) > 1:
+        scenario_success = aggregates.scenario_table()['Tasa_Éxito'].sort_values(ascending=False)
 
         bars = plt.bar(range(len(scenario_success)), scenario_success.values,
                        color=['#3498db', '#e67e22', '#9b59b6'][:len(scenario_success)])
@@ -154,17 +228,16 @@ def create_plots(results_df):
 
     # 6. Heatmap de correlaciones
     plt.subplot(2, 3, 6)
-    numeric_cols = ['rounds', 'total_time', 'q_mu', 'a_mu', 'questions_asked']
-    available_cols = [col for col in numeric_cols if col in results_df.columns]
-
-    if len(available_cols) > 2:
-        corr_matrix = results_df[available_cols].corr()
+    if len(aggregates) > 1:
+        corr_matrix = aggregates.correlation()
         sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', center=0,
                     square=True, fmt='.2f', cbar_kws={'shrink': 0.8})
     plt.title('Correlaciones entre Variables', fontsize=12, fontweight='bold')
 
     plt.tight_layout()
-    plt.savefig('simulation_comprehensive_analysis.png', dpi=300, bbox_inches='tight')
+    path = f'{filename}.{fmt}'
+    plt.savefig(path, dpi=dpi, format=fmt, bbox_inches='tight')
     plt.close()
 
-    print("📈 Visualizaciones guardadas como 'simulation_comprehensive_analysis.png'")
+    print(f"📈 Visualizaciones guardadas como '{path}'")
+    return path
@@ -0,0 +1,213 @@
+import argparse
+import asyncio
+import random
+import time
+from instrumentation import count
+from bots import QuestionerBot, AnswererBot
+from game_engine import GameEngine
+
+class AsyncAgent:
+    """Adapta un bot síncrono (QuestionerBot/AnswererBot) a la interfaz async
+
+    Los atributos que no define (bot_id, skill_mu, ...) se leen y escriben
+    en el bot envuelto, así ScoringSystem y Matchmaker lo tratan igual.
+    """
+
+    def __init__(self, bot):
+        object.__setattr__(self, 'bot', bot)
+
+    def __getattr__(self, name):
+        return getattr(self.bot, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.bot, name, value)
+
+    async def generate_question(self, game_state):
+        return self.bot.generate_question(game_state)
+
+    async def answer_question(self, question, keyword, category):
+        return self.bot.answer_question(question, keyword, category)
+
+class StubAgent(AsyncAgent):
+    """Agente local de prueba: responde como el bot envuelto tras una latencia simulada
+
+    latency es un rango (mínimo, máximo) en segundos sorteado en cada
+    jugada; sirve para probar timeouts y concurrencia sin agentes reales.
+    """
+
+    def __init__(self, bot, latency=(0.5, 3.0), rng=None):
+        super().__init__(bot)
+        object.__setattr__(self, 'latency', latency)
+        object.__setattr__(self, 'rng', rng or random)
+
+    async def _wait(self):
+        low, high = self.latency
+        await asyncio.sleep(self.rng.uniform(low, high))
+
+    async def generate_question(self, game_state):
+        await self._wait()
+        return self.bot.generate_question(game_state)
+
+    async def answer_question(self, question, keyword, category):
+        await self._wait()
+        return self.bot.answer_question(question, keyword, category)
+
+class AsyncGameEngine(GameEngine):
+    """Motor de juego sobre asyncio para agentes reales (lentos)
+
+    Mismas reglas que GameEngine.run_game, pero las jugadas se esperan con
+    await y time_limit es un timeout real por jugada (pregunta + respuesta):
+    si el agente no termina a tiempo la partida termina con 'timeout'.
+    Miles de partidas pueden correr a la vez en un solo event loop.
+    """
+
+    def __init__(self, max_rounds=20, time_limit=60, rng=None, max_concurrency=1000):
+        super().__init__(max_rounds=max_rounds, time_limit=time_limit, rng=rng)
+        self.max_concurrency = max_concurrency
+        self._active = 0
+        self._busy_time = 0.0
+        self.max_active = 0
+
+    def _timeout_result(self, round_num, game_state):
+        count('games_timeout')
+        count('rounds_simulated', round_num + 1)
+        return {
+            'status': 'timeout',
+            'rounds': round_num + 1,
+            'history': game_state['history'],
+            'winner': 'answerer'
+        }
+
+    async def run_game(self, questioner, answerer, keyword, category):
+        """Ejecuta una partida completa esperando a los agentes"""
+        loop = asyncio.get_running_loop()
+        game_state = {
+            'keyword': keyword,
+            'category': category,
+            'round': 0,
+            'guessed': False,
+            'history': [],
+            'start_time': time.time(),
+            'questioner_id': questioner.bot_id,
+            'answerer_id': answerer.bot_id
+        }
+
+        # Determinar número de rondas (variable para realismo)
+        max_rounds = self.rng.randint(5, self.max_rounds)
+
+        for round_num in range(max_rounds):
+            game_state['round'] = round_num
+            move_start = loop.time()
+
+            try:
+                question = await asyncio.wait_for(questioner.generate_question(game_state),
+                                                  self.time_limit)
+                remaining = self.time_limit - (loop.time() - move_start)
+                answer = await asyncio.wait_for(answerer.answer_question(question, keyword, category),
+                                                max(remaining, 0))
+            except asyncio.TimeoutError:
+                return self._timeout_result(round_num, game_state)
+
+            processing_time = loop.time() - move_start
+            game_state['history'].append((question, answer, processing_time))
+
+            # Simular probabilidad de acierto (aumenta con las rondas)
+            base_probability = 0.05
+            round_bonus = 0.03 * round_num
+            skill_bonus = (questioner.skill_mu - 600) / 1000
+
+            guess_probability = base_probability + round_bonus + skill_bonus
+            guess_probability = max(0.01, min(0.8, guess_probability))
+
+            if self.rng.random() < guess_probability:
+                game_state['guessed'] = True
+                break
+
+        # Determinar resultado
+        if game_state['guessed']:
+            status = 'success'
+            winner = 'questioner'
+        else:
+            status = 'failure'
+            winner = 'answerer'
+
+        self.games_played += 1
+        count('games_played')
+        count('rounds_simulated', game_state['round'] + 1)
+        return {
+            'status': status,
+            'rounds': game_state['round'] + 1,
+            'history': game_state['history'],
+            'winner': winner,
+            'total_time': sum([h[2] for h in game_state['history']])
+        }
+
+    async def _run_limited(self, semaphore, game):
+        async with semaphore:
+            self._active += 1
+            self.max_active = max(self.max_active, self._active)
+            start = time.perf_counter()
+            try:
+                return await self.run_game(*game)
+            finally:
+                self._busy_time += time.perf_counter() - start
+                self._active -= 1
+
+    async def run_games(self, games):
+        """Ejecuta partidas (questioner, answerer, keyword, category) concurrentemente
+
+        Devuelve (resultados en el orden de games, métricas de throughput).
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.max_active = 0
+        self._busy_time = 0.0
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._run_limited(semaphore, game) for game in games))
+        elapsed = time.perf_counter() - start
+
+        stats = {
+            'games': len(results),
+            'seconds': elapsed,
+            'games_per_second': len(results) / elapsed if elapsed > 0 else float('inf'),
+            'max_concurrent': self.max_active,
+            # Partidas en curso en promedio: tiempo total de partidas / tiempo de pared
+            'avg_concurrent': self._busy_time / elapsed if elapsed > 0 else 0.0,
+            'timeouts': sum(result['status'] == 'timeout' for result in results)
+        }
+        return results, stats
+
+def run_games_async(engine, games):
+    """Atajo síncrono: corre engine.run_games en un event loop nuevo"""
+    return asyncio.run(engine.run_games(games))
+
+def print_throughput(stats):
+    print(f"⚡ {stats['games']} juegos en {stats['seconds']:.2f}s "
+          f"({stats['games_per_second']:.1f} juegos/s)")
+    print(f"   Concurrencia máxima: {stats['max_concurrent']}  "
+          f"promedio: {stats['avg_concurrent']:.1f}")
+    print(f"   Timeouts: {stats['timeouts']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Partidas concurrentes con agentes async de prueba")
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--bots', type=int, default=50, help='Bots por rol')
+    parser.add_argument('--latency', type=float, nargs=2, default=(0.01, 0.1),
+                        metavar=('MIN', 'MAX'), help='Latencia por jugada de los agentes (s)')
+    parser.add_argument('--time-limit', type=float, default=0.25, help='Timeout por jugada (s)')
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    latency = tuple(args.latency)
+    questioners = [StubAgent(QuestionerBot(rng=rng), latency, rng) for _ in range(args.bots)]
+    answerers = [StubAgent(AnswererBot(rng=rng), latency, rng) for _ in range(args.bots)]
+    games = [(rng.choice(questioners), rng.choice(answerers), 'car', 'things')
+             for _ in range(args.games)]
+
+    engine = AsyncGameEngine(time_limit=args.time_limit, rng=rng, max_concurrency=args.concurrency)
+    _, stats = run_games_async(engine, games)
+    print_throughput(stats)
+
+if __name__ == "__main__":
+    main()
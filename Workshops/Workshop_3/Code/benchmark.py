@@ -0,0 +1,242 @@
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from data_loader import load_csv_robust
+from preprocessing import clean_games_data
+from bots import QuestionerBot, AnswererBot
+from game_engine import GameEngine
+from scoring import ScoringSystem
+from matchmaking import Matchmaker
+from simulation import run_simulation
+from analysis import analyze_results
+
+SYNTHETIC_KEYWORDS = {
+    'car': 'things', 'phone': 'things', 'radio': 'things', 'camera': 'things',
+    'tree': 'place', 'house': 'place', 'building': 'place', 'truck': 'things',
+    'dog': 'animal', 'cat': 'animal', 'flower': 'things', 'apple': 'things'
+}
+SYNTHETIC_ANSWERS = ['yes', 'no', 'maybe', 'y', 'n', 'possibly', 'unknown']
+SYNTHETIC_QUESTIONS = [
+    'Is it alive?', 'is it BIG', 'Is it electronic!', 'can you hold it',
+    'is it made of metal?', 'x', 'does it have   moving parts'
+]
+
+def make_keywords_data(num_keywords=None):
+    """Dataset sintético de palabras clave (keyword, category)"""
+    keywords = dict(SYNTHETIC_KEYWORDS)
+    rng = np.random.default_rng(0)
+    categories = ['things', 'place', 'animal']
+    for i in range(len(keywords), num_keywords or len(keywords)):
+        keywords[f'keyword_{i}'] = categories[rng.integers(0, len(categories))]
+    return pd.DataFrame({'keyword': list(keywords), 'category': list(keywords.values())})
+
+def make_games_data(num_rows, keywords_df, seed=0, max_turns=20):
+    """Dataset sintético de juegos con el formato del CSV de Kaggle"""
+    rng = np.random.default_rng(seed)
+    keywords = keywords_df['keyword'].to_numpy()
+    turns = rng.integers(1, max_turns + 1, size=num_rows)
+    answers = np.array(SYNTHETIC_ANSWERS)
+    questions = np.array(SYNTHETIC_QUESTIONS)
+
+    return pd.DataFrame({
+        'keyword': keywords[rng.integers(0, len(keywords), size=num_rows)],
+        'answers': [str(list(answers[rng.integers(0, len(answers), size=n)])) for n in turns],
+        'questions': [str(list(questions[rng.integers(0, len(questions), size=n)])) for n in turns],
+        'guessed': rng.random(num_rows) < 0.5
+    })
+
+# tracemalloc hace mucho más lentas las asignaciones, así que la memoria se
+# mide en una segunda ejecución separada de la que se cronometra
+TRACK_MEMORY = True
+# Etapas más grandes que esto no repiten la ejecución para medir memoria
+MEMORY_MAX_SIZE = 10**6
+
+def measure(setup, size=0):
+    """Mide tiempo y pico de memoria de una etapa, sin imprimir su salida
+
+    setup() prepara las entradas y devuelve la etapa como función sin
+    argumentos. Se llama otra vez antes de la ejecución con tracemalloc,
+    así las dos parten del mismo estado aunque la etapa modifique bots,
+    emparejamiento o historial. El pico es None si no se midió.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        stage = setup()
+        start = time.perf_counter()
+        result = stage()
+        elapsed = time.perf_counter() - start
+
+        peak = None
+        if TRACK_MEMORY and size <= MEMORY_MAX_SIZE:
+            stage = setup()
+            tracemalloc.start()
+            stage()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+def _record(results, stage, size, elapsed, peak, unit):
+    results.append({
+        'stage': stage,
+        'size': size,
+        'seconds': elapsed,
+        f'{unit}_per_sec': size / elapsed if elapsed > 0 else float('inf'),
+        'peak_memory_mb': peak / 2**20 if peak is not None else None
+    })
+    memory = f"{peak / 2**20:8.1f} MB" if peak is not None else "     n/a"
+    print(f"   {stage:<28} n={size:<9} {elapsed:8.3f}s  {size / max(elapsed, 1e-9):12.0f} {unit}/s  "
+          f"{memory}")
+
+def bench_data_stages(num_rows, results):
+    """Carga y limpieza de num_rows filas"""
+    keywords_df = make_keywords_data()
+    games_df = make_games_data(num_rows, keywords_df)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'games_data.csv')
+        games_df.to_csv(path, index=False)
+        games_df, elapsed, peak = measure(lambda: functools.partial(load_csv_robust, path), num_rows)
+        _record(results, 'load_csv_robust', num_rows, elapsed, peak, 'rows')
+
+    (df_clean, keyword_dict), elapsed, peak = measure(
+        lambda: functools.partial(clean_games_data, games_df.copy(), keywords_df), num_rows)
+    _record(results, 'clean_games_data', num_rows, elapsed, peak, 'rows')
+    return df_clean, keyword_dict
+
+def bench_game_stages(num_games, num_bots, results):
+    """Emparejamiento, juego y puntaje por separado
+
+    Cada etapa arranca de bots, emparejamiento y puntaje nuevos (con la
+    misma semilla) y corre sin medir las etapas anteriores que necesita.
+    """
+    def new_systems():
+        random.seed(0)
+        questioners = [QuestionerBot() for _ in range(num_bots)]
+        answerers = [AnswererBot() for _ in range(num_bots)]
+        return questioners, answerers, Matchmaker(), GameEngine(), ScoringSystem()
+
+    def match_all(questioners, answerers, matchmaker):
+        return [matchmaker.find_match(questioners, answerers) for _ in range(num_games)]
+
+    def play_all(engine, pairs):
+        return [engine.run_game(q, a, 'car', 'things') for q, a in pairs]
+
+    def score_all(scoring, pairs, games):
+        for (q, a), game in zip(pairs, games):
+            scoring.update_skills(q, a, game)
+
+    def setup_match():
+        questioners, answerers, matchmaker, _, _ = new_systems()
+        return functools.partial(match_all, questioners, answerers, matchmaker)
+    _, elapsed, peak = measure(setup_match, num_games)
+    _record(results, 'Matchmaker.find_match', num_games, elapsed, peak, 'games')
+
+    def setup_play():
+        questioners, answerers, matchmaker, engine, _ = new_systems()
+        pairs = match_all(questioners, answerers, matchmaker)
+        return functools.partial(play_all, engine, pairs)
+    _, elapsed, peak = measure(setup_play, num_games)
+    _record(results, 'GameEngine.run_game', num_games, elapsed, peak, 'games')
+
+    def setup_score():
+        questioners, answerers, matchmaker, engine, scoring = new_systems()
+        pairs = match_all(questioners, answerers, matchmaker)
+        return functools.partial(score_all, scoring, pairs, play_all(engine, pairs))
+    _, elapsed, peak = measure(setup_score, num_games)
+    _record(results, 'ScoringSystem.update_skills', num_games, elapsed, peak, 'games')
+
+def bench_simulation(df_clean, keyword_dict, num_games, results, config=None):
+    """Simulación completa y análisis sobre sus resultados"""
+    config = {'num_games': num_games, 'num_questioners': 8, 'num_answerers': 8, **(config or {})}
+    results_df, elapsed, peak = measure(
+        lambda: functools.partial(run_simulation, df_clean, keyword_dict, config), num_games)
+    _record(results, 'run_simulation', len(results_df), elapsed, peak, 'games')
+
+    _, elapsed, peak = measure(
+        lambda: functools.partial(analyze_results, results_df, save_plots=False), len(results_df))
+    _record(results, 'analyze_results', len(results_df), elapsed, peak, 'games')
+
+def run_benchmarks(rows, games, num_bots=8):
+    """Corre todas las etapas y devuelve el reporte como diccionario"""
+    results = []
+    df_clean, keyword_dict = None, None
+
+    for num_rows in rows:
+        print(f"\n📏 Datos: {num_rows} filas")
+        df_clean, keyword_dict = bench_data_stages(num_rows, results)
+
+    print(f"\n🎮 Juegos: {games}")
+    bench_game_stages(games, num_bots, results)
+    if df_clean is not None and len(df_clean):
+        bench_simulation(df_clean, keyword_dict, games, results)
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+def compare_reports(baseline_path, current_path, threshold=0.10):
+    """Compara dos reportes JSON y devuelve las etapas que empeoraron más de threshold"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['stage'], r['size']): r for r in json.load(f)['results']}
+    with open(current_path, 'r', encoding='utf-8') as f:
+        current = {(r['stage'], r['size']): r for r in json.load(f)['results']}
+
+    regressions = []
+    print(f"{'etapa':<28}{'n':>10}{'base (s)':>12}{'actual (s)':>12}{'cambio':>10}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key]['seconds'], current[key]['seconds']
+        change = (after - before) / before if before > 0 else 0.0
+        flag = ' ⚠️' if change > threshold else ''
+        print(f"{key[0]:<28}{key[1]:>10}{before:>12.3f}{after:>12.3f}{change:>+10.1%}{flag}")
+        if change > threshold:
+            regressions.append({'stage': key[0], 'size': key[1], 'change': change})
+    return regressions
+
+def main():
+    global TRACK_MEMORY, MEMORY_MAX_SIZE
+    parser = argparse.ArgumentParser(description="Benchmarks de la simulación '20 Questions'")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000],
+                        help='Tamaños del dataset sintético (10^3 a 10^7 filas)')
+    parser.add_argument('--games', type=int, default=1000, help='Juegos por etapa de juego')
+    parser.add_argument('--bots', type=int, default=8, help='Bots por rol')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'ACTUAL'),
+                        help='Compara dos reportes JSON en lugar de correr benchmarks')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Empeoramiento relativo que cuenta como regresión')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='No medir pico de memoria (evita la segunda ejecución)')
+    parser.add_argument('--memory-max-size', type=int, default=MEMORY_MAX_SIZE,
+                        help='Tamaño máximo de etapa para medir memoria (segunda ejecución)')
+    args = parser.parse_args()
+
+    TRACK_MEMORY = not args.no_memory
+    MEMORY_MAX_SIZE = args.memory_max_size
+
+    if args.compare:
+        regressions = compare_reports(*args.compare, threshold=args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones por encima de {args.threshold:.0%}")
+            raise SystemExit(1)
+        print("\n✅ Sin regresiones")
+        return
+
+    report = run_benchmarks(args.rows, args.games, args.bots)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados guardados en '{args.output}'")
+
+if __name__ == "__main__":
+    main()
@@ -1,109 +1,304 @@
 import random
+from collections import deque
+from functools import lru_cache
 import numpy as np
 
+# Rondas que conserva cada bot en su historial (None = sin límite)
+HISTORY_LIMIT = 100
+
+def _new_history(history_limit):
+    """Historial acotado (deque) o desactivado (None si history_limit == 0)"""
+    if history_limit == 0:
+        return None
+    return deque(maxlen=history_limit)
+
+# Bancos de preguntas internados: cada pregunta tiene un id entero fijo
+GENERAL_QUESTIONS = (
+    "is it a living thing",
+    "is it something you can hold",
+    "is it man-made",
+    "is it larger than a person",
+    "is it found indoors"
+)
+CATEGORY_QUESTIONS = (
+    "is it used daily",
+    "is it made of metal",
+    "can you eat it",
+    "is it electronic",
+    "does it have moving parts"
+)
+SPECIFIC_QUESTIONS = (
+    "is it found in a kitchen",
+    "is it used for transportation",
+    "is it decorative",
+    "can it be worn",
+    "does it require electricity"
+)
+RANDOM_QUESTIONS = (
+    "is it alive", "is it big", "is it small", "is it useful",
+    "is it expensive", "is it common", "is it rare", "is it old"
+)
+
+QUESTION_BANK = GENERAL_QUESTIONS + CATEGORY_QUESTIONS + SPECIFIC_QUESTIONS + RANDOM_QUESTIONS
+QUESTION_IDS = {question: i for i, question in enumerate(QUESTION_BANK)}
+
+def _bank_ids(questions):
+    return np.array([QUESTION_IDS[q] for q in questions], dtype=np.int16)
+
+GENERAL_IDS = _bank_ids(GENERAL_QUESTIONS)
+CATEGORY_IDS = _bank_ids(CATEGORY_QUESTIONS)
+SPECIFIC_IDS = _bank_ids(SPECIFIC_QUESTIONS)
+RANDOM_IDS = _bank_ids(RANDOM_QUESTIONS)
+
+def choose_question(strategy, round_num, rng=random):
+    """Elige una pregunta según la estrategia y la ronda"""
+    if strategy == "adaptive":
+        if round_num == 0:
+            return rng.choice(GENERAL_QUESTIONS)
+        elif round_num < 5:
+            return rng.choice(CATEGORY_QUESTIONS)
+        else:
+            return rng.choice(SPECIFIC_QUESTIONS)
+    else:
+        # Estrategia aleatoria
+        return rng.choice(RANDOM_QUESTIONS)
+
+def sample_question_ids(strategy, n_games, n_rounds, rng=None):
+    """Genera los ids de pregunta de muchas partidas y rondas de una vez
+
+    Devuelve un arreglo (n_games, n_rounds) con ids de QUESTION_BANK y la
+    misma distribución que choose_question en cada ronda.
+    """
+    rng = np.random.default_rng(rng)
+    if strategy != "adaptive":
+        return RANDOM_IDS[rng.integers(0, len(RANDOM_IDS), size=(n_games, n_rounds))]
+
+    ids = np.empty((n_games, n_rounds), dtype=np.int16)
+    for bank, rounds in ((GENERAL_IDS, slice(0, 1)), (CATEGORY_IDS, slice(1, 5)),
+                         (SPECIFIC_IDS, slice(5, None))):
+        width = len(range(n_rounds)[rounds])
+        if width:
+            ids[:, rounds] = bank[rng.integers(0, len(bank), size=(n_games, width))]
+    return ids
+
+# Tipos de regla para (pregunta, palabra clave, categoría)
+ANSWER_NO = 0
+ANSWER_YES = 1
+ANSWER_HOLD = 2    # 'hold' con categoría 'things': sí con probabilidad 0.6
+ANSWER_RANDOM = 3  # Sin regla: sí con probabilidad 0.4
+
+LIVING_WORDS = ("plant", "tree", "flower")
+ELECTRONIC_WORDS = ("computer", "phone", "television", "radio", "camera", "microphone")
+LARGE_ITEMS = ("truck", "house", "building", "car", "tree")
+
+@lru_cache(maxsize=None)
+def answer_rule(question, keyword, category):
+    """Regla de respuesta para una combinación (se calcula una sola vez)"""
+    question = question.lower()
+    keyword = keyword.lower()
+
+    # Lógica de respuesta basada en contenido
+    if "living" in question or "alive" in question:
+        if category == "animal" or any(word in keyword for word in LIVING_WORDS):
+            return ANSWER_YES
+        return ANSWER_NO
+    elif "electronic" in question:
+        if any(word in keyword for word in ELECTRONIC_WORDS):
+            return ANSWER_YES
+        return ANSWER_NO
+    elif "hold" in question:
+        if category == "things":
+            return ANSWER_HOLD
+        return ANSWER_NO
+    elif "big" in question or "large" in question:
+        if any(word in keyword for word in LARGE_ITEMS):
+            return ANSWER_YES
+        return ANSWER_NO
+    # Respuesta aleatoria ponderada
+    return ANSWER_RANDOM
+
+@lru_cache(maxsize=None)
+def question_rules(keyword, category):
+    """Tipos de regla de todas las preguntas de QUESTION_BANK para una palabra clave
+
+    Es la fila de la matriz palabra clave x pregunta, calculada la primera
+    vez que aparece cada palabra clave y luego solo consultada.
+    """
+    return np.array([answer_rule(q, keyword, category) for q in QUESTION_BANK], dtype=np.int8)
+
+def answer_ids_batch(question_ids, keywords, categories, consistency, rng=None):
+    """Responde por id arreglos (n_games, n_rounds) de preguntas
+
+    Busca la regla precalculada de cada (palabra clave, pregunta) y aplica
+    los sorteos de las reglas aleatorias y de la consistencia con NumPy.
+    """
+    rng = np.random.default_rng(rng)
+    rules = np.stack([question_rules(k, c) for k, c in zip(keywords, categories)])
+    rules = np.take_along_axis(rules, question_ids.astype(np.int64), axis=1)
+
+    draws = rng.random(rules.shape)
+    correct = np.where(rules == ANSWER_HOLD, draws > 0.4,
+                       np.where(rules == ANSWER_RANDOM, draws >= 0.6, rules == ANSWER_YES))
+    correct = correct.astype(float)
+
+    consistent = rng.random(rules.shape) < np.asarray(consistency, dtype=float)[:, None]
+    neutral = rng.random(rules.shape) < 0.3
+    return np.where(consistent, correct, np.where(neutral, 0.5, 1 - correct))
+
+def resolve_answer(rule, rng=random):
+    """Convierte un tipo de regla en la respuesta correcta (0 o 1)"""
+    if rule == ANSWER_HOLD:
+        return 1 if rng.random() > 0.4 else 0
+    if rule == ANSWER_RANDOM:
+        # Igual que random.choices([0, 1], weights=[0.6, 0.4])
+        return 1 if rng.random() >= 0.6 else 0
+    return rule
+
+def answer_with_consistency(question, keyword, category, consistency, rng=random):
+    """Responde según la palabra clave y aplica la consistencia del bot"""
+    correct_answer = resolve_answer(answer_rule(question, keyword, category), rng)
+
+    # Aplicar consistencia del bot
+    if rng.random() < consistency:
+        return correct_answer
+    # Respuesta inconsistente
+    return 0.5 if rng.random() < 0.3 else (1 - correct_answer)
+
 class QuestionerBot:
     """Bot que genera preguntas estratégicas"""
 
-    def __init__(self, strategy="adaptive", bot_id=None):
+    __slots__ = ('strategy', 'bot_id', 'skill_mu', 'skill_sigma',
+                 'question_history', 'performance_history', 'rng')
+
+    def __init__(self, strategy="adaptive", bot_id=None, history_limit=HISTORY_LIMIT, rng=None):
+        self.rng = rng or random
         self.strategy = strategy
-        self.bot_id = bot_id or f"Q_{random.randint(1000, 9999)}"
-        self.skill_mu = 600 + random.uniform(-50, 50)
+        self.bot_id = bot_id or f"Q_{self.rng.randint(1000, 9999)}"
+        self.skill_mu = 600 + self.rng.uniform(-50, 50)
         self.skill_sigma = 100
-        self.question_history = []
-        self.performance_history = []
+        self.question_history = _new_history(history_limit)
+        self.performance_history = _new_history(history_limit)
 
     def generate_question(self, game_state):
         """Genera pregunta basada en la estrategia del bot"""
-        round_num = game_state.get('round', 0)
-        category = game_state.get('category', 'unknown')
-
-        if self.strategy == "adaptive":
-            if round_num == 0:
-                general_questions = [
-                    "is it a living thing",
-                    "is it something you can hold",
-                    "is it man-made",
-                    "is it larger than a person",
-                    "is it found indoors"
-                ]
-                question = random.choice(general_questions)
-            elif round_num < 5:
-                category_questions = [
-                    "is it used daily",
-                    "is it made of metal",
-                    "can you eat it",
-                    "is it electronic",
-                    "does it have moving parts"
-                ]
-                question = random.choice(category_questions)
-            else:
-                specific_questions = [
-                    "is it found in a kitchen",
-                    "is it used for transportation",
-                    "is it decorative",
-                    "can it be worn",
-                    "does it require electricity"
-                ]
-                question = random.choice(specific_questions)
-        else:
-            # Estrategia aleatoria
-            all_questions = [
-                "is it alive", "is it big", "is it small", "is it useful",
-                "is it expensive", "is it common", "is it rare", "is it old"
-            ]
-            question = random.choice(all_questions)
-
-        self.question_history.append(question)
+        question = choose_question(self.strategy, game_state.get('round', 0), self.rng)
+
+        if self.question_history is not None:
+            self.question_history.append(question)
         return question
 
 class AnswererBot:
     """Bot que responde preguntas basado en la palabra clave"""
 
-    def __init__(self, consistency=0.8, bot_id=None):
+    __slots__ = ('consistency', 'bot_id', 'skill_mu', 'skill_sigma', 'response_history', 'rng')
+
+    def __init__(self, consistency=0.8, bot_id=None, history_limit=HISTORY_LIMIT, rng=None):
+        self.rng = rng or random
         self.consistency = consistency
-        self.bot_id = bot_id or f"A_{random.randint(1000, 9999)}"
-        self.skill_mu = 600 + random.uniform(-50, 50)
+        self.bot_id = bot_id or f"A_{self.rng.randint(1000, 9999)}"
+        self.skill_mu = 600 + self.rng.uniform(-50, 50)
         self.skill_sigma = 100
-        self.response_history = []
+        self.response_history = _new_history(history_limit)
 
     def answer_question(self, question, keyword, category):
         """Responde a una pregunta basada en la palabra clave"""
-        question = question.lower()
-        keyword = keyword.lower()
-
-        # Lógica de respuesta basada en contenido
-        if "living" in question or "alive" in question:
-            if category == "animal" or any(word in keyword for word in ["plant", "tree", "flower"]):
-                correct_answer = 1
-            else:
-                correct_answer = 0
-        elif "electronic" in question:
-            electronic_words = ["computer", "phone", "television", "radio", "camera", "microphone"]
-            if any(word in keyword for word in electronic_words):
-                correct_answer = 1
-            else:
-                correct_answer = 0
-        elif "hold" in question:
-            if category == "things" and random.random() > 0.4:
-                correct_answer = 1
-            else:
-                correct_answer = 0
-        elif "big" in question or "large" in question:
-            large_items = ["truck", "house", "building", "car", "tree"]
-            if any(word in keyword for word in large_items):
-                correct_answer = 1
-            else:
-                correct_answer = 0
-        else:
-            # Respuesta aleatoria ponderada
-            correct_answer = random.choices([0, 1], weights=[0.6, 0.4])[0]
+        final_answer = answer_with_consistency(question, keyword, category, self.consistency, self.rng)
 
-        # Aplicar consistencia del bot
-        if random.random() < self.consistency:
-            final_answer = correct_answer
-        else:
-            # Respuesta inconsistente
-            final_answer = 0.5 if random.random() < 0.3 else (1 - correct_answer)
-
-        self.response_history.append(final_answer)
+        if self.response_history is not None:
+            self.response_history.append(final_answer)
         return final_answer
+
+class BotPopulation:
+    """Población de bots en estructura de arreglos (struct-of-arrays)
+
+    skill_mu, skill_sigma, estrategia y consistencia viven en arreglos de
+    NumPy; cada bot se expone como una vista liviana con la misma interfaz
+    de atributos que QuestionerBot/AnswererBot, así que el motor, el
+    puntaje y el emparejamiento funcionan sin cambios. Las vistas no
+    guardan historial.
+    """
+
+    STRATEGIES = ["adaptive", "random"]
+
+    def __init__(self, role, size, strategy="adaptive", consistency=0.8, rng=None):
+        self.rng = rng or random
+        self.role = role  # 'questioner' o 'answerer'
+        self.size = size
+        prefix = "Q" if role == "questioner" else "A"
+        self.bot_ids = []
+        skills = []
+        for _ in range(size):
+            # Mismo orden de sorteos que QuestionerBot/AnswererBot
+            self.bot_ids.append(f"{prefix}_{self.rng.randint(1000, 9999)}")
+            skills.append(600 + self.rng.uniform(-50, 50))
+        self.skill_mu = np.array(skills)
+        self.skill_sigma = np.full(size, 100.0)
+        self.strategy = np.full(size, self.STRATEGIES.index(strategy), dtype=np.int8)
+        self.consistency = np.full(size, consistency, dtype=np.float64)
+        view_class = QuestionerView if role == "questioner" else AnswererView
+        self._views = [view_class(self, i) for i in range(size)]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        return self._views[i]
+
+    def __iter__(self):
+        return iter(self._views)
+
+class _BotView:
+    """Vista de un bot dentro de una BotPopulation"""
+
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    @property
+    def bot_id(self):
+        return self.population.bot_ids[self.index]
+
+    @property
+    def skill_mu(self):
+        return float(self.population.skill_mu[self.index])
+
+    @skill_mu.setter
+    def skill_mu(self, value):
+        self.population.skill_mu[self.index] = value
+
+    @property
+    def skill_sigma(self):
+        return float(self.population.skill_sigma[self.index])
+
+    @skill_sigma.setter
+    def skill_sigma(self, value):
+        self.population.skill_sigma[self.index] = value
+
+class QuestionerView(_BotView):
+    """Questioner de una BotPopulation"""
+
+    __slots__ = ()
+
+    @property
+    def strategy(self):
+        return BotPopulation.STRATEGIES[self.population.strategy[self.index]]
+
+    def generate_question(self, game_state):
+        """Genera pregunta basada en la estrategia del bot"""
+        return choose_question(self.strategy, game_state.get('round', 0), self.population.rng)
+
+class AnswererView(_BotView):
+    """Answerer de una BotPopulation"""
+
+    __slots__ = ()
+
+    @property
+    def consistency(self):
+        return float(self.population.consistency[self.index])
+
+    def answer_question(self, question, keyword, category):
+        """Responde a una pregunta basada en la palabra clave"""
+        return answer_with_consistency(question, keyword, category, self.consistency,
+                                       self.population.rng)
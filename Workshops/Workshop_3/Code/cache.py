@@ -0,0 +1,102 @@
+import hashlib
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional: se usa pickle como respaldo
+    pa = None
+    feather = None
+
+from preprocessing import PREPROCESSING_VERSION
+
+def file_hash(file_path, block_size=8 * 1024 * 1024):
+    """Hash del contenido de un archivo leído por bloques"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def cache_key(*file_paths):
+    """Clave del cache: contenido de los archivos + versión del preprocesamiento"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(PREPROCESSING_VERSION.encode())
+    for path in file_paths:
+        h.update(file_hash(path).encode())
+    return h.hexdigest()
+
+def _sequence_text(value):
+    """Texto de una lista o arreglo igual para ambas formas (Feather devuelve arreglos)"""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        values = np.asarray(value)
+        if values.dtype.kind in 'biuf':
+            values = values.astype(float)
+        return repr(values.tolist())
+    return repr(value)
+
+def frame_hash(df):
+    """Hash del contenido de un DataFrame (columnas y valores, en orden)
+
+    No incluye las etiquetas del índice, que cambian al recargar desde el
+    cache. Las columnas con listas (no hasheables) se hashean como texto.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for name in df.columns:
+        column = df[name]
+        try:
+            hashed = pd.util.hash_pandas_object(column, index=False)
+        except TypeError:
+            hashed = pd.util.hash_pandas_object(column.map(_sequence_text), index=False)
+        h.update(str(name).encode())
+        h.update(hashed.to_numpy().tobytes())
+    return h.hexdigest()
+
+def _paths(cache_dir, key):
+    base = os.path.join(cache_dir, f"clean_{key}")
+    return base + '.feather', base + '.pkl', base + '_keywords.pkl'
+
+def load_clean_cache(cache_dir, key):
+    """Carga el DataFrame limpio y keyword_dict si existen en el cache"""
+    feather_path, pickle_path, keywords_path = _paths(cache_dir, key)
+    if not os.path.exists(keywords_path):
+        return None
+
+    if feather is not None and os.path.exists(feather_path):
+        # Lectura con memory-map: las columnas numéricas no se copian
+        df = feather.read_table(feather_path, memory_map=True).to_pandas()
+    elif os.path.exists(pickle_path):
+        df = pd.read_pickle(pickle_path)
+    else:
+        return None
+
+    with open(keywords_path, 'rb') as f:
+        keyword_dict = pickle.load(f)
+
+    print(f"⚡ Datos limpios cargados desde cache: {df.shape}")
+    return df, keyword_dict
+
+def save_clean_cache(cache_dir, key, df, keyword_dict):
+    """Guarda el DataFrame limpio (Feather sin compresión) y keyword_dict"""
+    os.makedirs(cache_dir, exist_ok=True)
+    feather_path, pickle_path, keywords_path = _paths(cache_dir, key)
+
+    saved = False
+    if feather is not None:
+        try:
+            table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+            feather.write_feather(table, feather_path, compression='uncompressed')
+            saved = True
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+            print(f"⚠️  No se pudo guardar en Feather ({str(e)[:80]}), usando pickle")
+    if not saved:
+        df.to_pickle(pickle_path, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Pickle conserva claves y categorías tal cual (NaN, números), igual que sin cache
+    with open(keywords_path, 'wb') as f:
+        pickle.dump(keyword_dict, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    print(f"💾 Datos limpios guardados en cache ({cache_dir})")
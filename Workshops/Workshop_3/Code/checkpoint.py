@@ -0,0 +1,171 @@
+import glob
+import json
+import os
+import pickle
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional: se usa pickle como respaldo
+    feather = None
+
+from cache import frame_hash
+from results_buffer import ResultsBuffer
+from scoring import RatingHistory
+
+# Claves de configuración que no cambian los resultados (no invalidan un checkpoint)
+RUNTIME_KEYS = ('parallel', 'num_workers', 'resume', 'checkpoint_dir', 'checkpoint_every')
+# Archivos que escribe este módulo: los únicos que se borran al empezar de nuevo
+CHECKPOINT_PATTERNS = ('manifest.json', '*_state.pkl', '*_state.pkl.tmp',
+                       '*_results_*.feather', '*_results_*.pkl',
+                       '*_history_*.feather', '*_history_*.pkl')
+
+def _write_frame(base, df):
+    """Guarda un bloque en Feather (columnar, categorías como diccionario) o pickle"""
+    if feather is not None:
+        feather.write_feather(df, base + '.feather')
+    else:
+        df.to_pickle(base + '.pkl', protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_frame(base):
+    if os.path.exists(base + '.feather'):
+        return feather.read_feather(base + '.feather')
+    return pd.read_pickle(base + '.pkl')
+
+def _atomic_pickle(path, obj):
+    """Escribe a un archivo temporal y lo renombra: nunca queda un estado a medias"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def prepare_checkpoints(config, game_data):
+    """Prepara el directorio de checkpoints de una corrida
+
+    Sin config['resume'] borra los checkpoints anteriores (solo los
+    archivos de checkpoint; si el directorio tiene otros archivos y no es
+    de checkpoints, no toca nada). Con resume verifica que sean de la
+    misma configuración y los mismos juegos.
+    """
+    directory = config['checkpoint_dir']
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, 'manifest.json')
+    manifest = {
+        'config': {k: v for k, v in sorted(config.items()) if k not in RUNTIME_KEYS},
+        'games': frame_hash(game_data)
+    }
+    manifest = json.loads(json.dumps(manifest, default=str))
+
+    if config['resume'] and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        if saved != manifest:
+            raise ValueError(f"Los checkpoints de {directory} son de otra configuración; "
+                             "correr sin --resume para empezar de nuevo")
+        print(f"♻️  Reanudando desde checkpoints en {directory}")
+        return
+
+    if not os.path.exists(manifest_path) and os.listdir(directory):
+        raise ValueError(f"{directory} no está vacío y no es un directorio de checkpoints; "
+                         "elegir otro checkpoint_dir")
+    for pattern in CHECKPOINT_PATTERNS:
+        for path in glob.glob(os.path.join(directory, pattern)):
+            os.remove(path)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+class TaskCheckpoint:
+    """Checkpoints de un (escenario, fragmento)
+
+    Cada guardado agrega los resultados y el historial de ratings nuevos
+    como bloques columnares (<escenario>_<fragmento>_results_00000...) y
+    luego reemplaza de forma atómica el estado: posición, bots, motor,
+    emparejamiento y puntaje (con sus generadores aleatorios), todo en un
+    solo pickle para conservar las referencias compartidas. Los bloques
+    escritos después del último estado se ignoran al reanudar.
+    """
+
+    def __init__(self, directory, scenario, shard=0, every=10000):
+        self.prefix = os.path.join(directory, f"{scenario}_{shard}")
+        self.every = every
+        self.position = 0
+        self.results_rows = 0
+        self.results_chunks = 0
+        self.history_recorded = 0
+        self.history_chunks = 0
+
+    def due(self, position):
+        """True si pasaron 'every' juegos desde el último checkpoint"""
+        return position - self.position >= self.every
+
+    def load(self):
+        """Estado guardado (o None) con los contadores de bloques restaurados"""
+        path = self.prefix + '_state.pkl'
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        for name in ('position', 'results_rows', 'results_chunks', 'history_recorded', 'history_chunks'):
+            setattr(self, name, state[name])
+        return state
+
+    def restore(self, state, results):
+        """Recupera los resultados y el historial de ratings del estado cargado"""
+        if isinstance(results, ResultsBuffer):
+            for i in range(self.results_chunks):
+                results.extend_dataframe(_read_frame(f"{self.prefix}_results_{i:05d}"))
+        else:
+            results = state['results']
+
+        scoring = state['systems']['scoring']
+        max_records, spill_path, chunk_size = state['history_params']
+        scoring.history = RatingHistory(max_records=max_records, spill_path=spill_path,
+                                        chunk_size=chunk_size)
+        for i in range(self.history_chunks):
+            df = _read_frame(f"{self.prefix}_history_{i:05d}")
+            scoring.history.extend(df['questioner_id'].to_numpy(), df['answerer_id'].to_numpy(),
+                                   df['q_mu_before'].to_numpy(), df['a_mu_before'].to_numpy(),
+                                   df['q_mu_after'].to_numpy(), df['a_mu_after'].to_numpy(),
+                                   df['result'].to_numpy(), df['rounds'].to_numpy())
+        scoring.history.total_recorded = self.history_recorded
+        return results
+
+    def save(self, position, systems, results, done=False):
+        """Escribe los bloques nuevos y luego el estado"""
+        if isinstance(results, ResultsBuffer):
+            if len(results) > self.results_rows:
+                _write_frame(f"{self.prefix}_results_{self.results_chunks:05d}",
+                             results.to_dataframe(start=self.results_rows))
+                self.results_chunks += 1
+                self.results_rows = len(results)
+            saved_results = None
+        else:
+            saved_results = results  # Agregados en línea: tamaño O(1)
+
+        scoring = systems['scoring']
+        history = scoring.history
+        new_records = min(history.total_recorded - self.history_recorded, len(history))
+        if new_records > 0:
+            _write_frame(f"{self.prefix}_history_{self.history_chunks:05d}",
+                         history.to_dataframe(start=len(history) - new_records))
+            self.history_chunks += 1
+        self.history_recorded = history.total_recorded
+
+        self.position = position
+        state = {
+            'position': position,
+            'done': done,
+            'systems': systems,
+            'results': saved_results,
+            'results_rows': self.results_rows,
+            'results_chunks': self.results_chunks,
+            'history_recorded': self.history_recorded,
+            'history_chunks': self.history_chunks,
+            'history_params': (history.max_records, history.spill_path, history.chunk_size)
+        }
+        # El historial ya está en bloques: no se serializa dentro del estado
+        scoring.history = None
+        try:
+            _atomic_pickle(self.prefix + '_state.pkl', state)
+        finally:
+            scoring.history = history
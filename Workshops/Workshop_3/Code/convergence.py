@@ -0,0 +1,108 @@
+import math
+from collections import deque
+from statistics import NormalDist
+import numpy as np
+
+# Semiancho máximo del intervalo de confianza de cada estadística (None = no se exige)
+DEFAULT_TARGETS = {
+    'success_rate': 0.03,  # Proporción de juegos con 'success'
+    'avg_rounds': 0.3,     # Rondas promedio
+    'skill_spread': 0.02   # Desviación estándar de skill_mu de todos los bots, relativo a su valor
+}
+
+class ConvergenceMonitor:
+    """Intervalos de confianza de un escenario para detenerlo al alcanzar la precisión
+
+    Cada batch_size juegos compara el semiancho de los intervalos con
+    targets: tasa de éxito (intervalo de Wilson), rondas promedio
+    (aproximación normal) y dispersión final de habilidades. Esta última
+    es el estado de la población y no un promedio de juegos, así que se
+    exige que sea estable: intervalo de las mediciones de las últimas
+    'window' tandas, con un objetivo relativo (su escala depende de
+    k_factor y de la cantidad de juegos).
+    """
+
+    def __init__(self, targets=None, confidence=0.95, batch_size=50, min_games=100, window=5):
+        self.targets = {**DEFAULT_TARGETS, **(targets or {})}
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.batch_size = batch_size
+        self.min_games = min_games
+        self.games = 0
+        self.successes = 0
+        self.rounds_sum = 0.0
+        self.rounds_sq = 0.0
+        self.spreads = deque(maxlen=window)
+        self.next_check = batch_size
+        self.converged = False
+
+    def add(self, status, rounds):
+        """Registra un juego o un bloque de juegos (escalares o arreglos)"""
+        status = np.asarray(status)
+        rounds = np.asarray(rounds, dtype=float)
+        self.games += rounds.size
+        self.successes += int(np.count_nonzero(status == 'success'))
+        self.rounds_sum += float(rounds.sum())
+        self.rounds_sq += float((rounds * rounds).sum())
+
+    def due(self):
+        """True si se completó una tanda desde la última revisión"""
+        return self.games >= self.next_check
+
+    def _success_interval(self):
+        n, z = self.games, self.z
+        p = self.successes / n
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+        return center, half_width
+
+    def _rounds_interval(self):
+        n = self.games
+        mean = self.rounds_sum / n
+        variance = max(self.rounds_sq - n * mean * mean, 0.0) / max(n - 1, 1)
+        return mean, self.z * math.sqrt(variance / n)
+
+    def _spread_interval(self):
+        spread = self.spreads[-1]
+        if len(self.spreads) < self.spreads.maxlen:
+            return spread, math.inf
+        return spread, self.z * np.std(self.spreads, ddof=1) / math.sqrt(len(self.spreads))
+
+    def intervals(self):
+        """{estadística: (estimación, semiancho)} con los juegos registrados"""
+        if self.games == 0:
+            return {}
+        intervals = {
+            'success_rate': self._success_interval(),
+            'avg_rounds': self._rounds_interval()
+        }
+        if self.spreads:
+            intervals['skill_spread'] = self._spread_interval()
+        return intervals
+
+    def check(self, questioners, answerers):
+        """Mide la dispersión de habilidades y devuelve True si ya se alcanzó la precisión"""
+        skills = np.fromiter((bot.skill_mu for pool in (questioners, answerers) for bot in pool),
+                             dtype=float)
+        self.spreads.append(float(skills.std()))
+        self.next_check = self.games + self.batch_size
+
+        intervals = self.intervals()
+        self.converged = self.games >= self.min_games and all(
+            target is None or self._half_width(intervals, name) <= target
+            for name, target in self.targets.items()
+        )
+        return self.converged
+
+    @staticmethod
+    def _half_width(intervals, name):
+        estimate, half_width = intervals[name]
+        if name == 'skill_spread':
+            return half_width / estimate if estimate > 0 else math.inf
+        return half_width
+
+    def report(self):
+        """Texto con cada estimación y su intervalo"""
+        return ", ".join(f"{name} {estimate:.3f} ± {half_width:.3f}"
+                         for name, (estimate, half_width) in self.intervals().items())
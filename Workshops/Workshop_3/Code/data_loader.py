@@ -1,18 +1,25 @@
+import io
 import pandas as pd
 import os
+from instrumentation import count, timed
 
+# Estrategias de lectura, de la más estricta a la más permisiva
+CSV_STRATEGIES = [
+    {'engine': 'python'},
+    {'engine': 'python', 'on_bad_lines': 'skip'},
+    {'engine': 'python', 'on_bad_lines': 'skip', 'quoting': 3},
+    {'engine': 'python', 'on_bad_lines': 'skip', 'quoting': 3, 'escapechar': '\\'},
+    {'engine': 'c', 'on_bad_lines': 'skip', 'error_bad_lines': False}
+]
+
+@timed('load_csv_robust')
 def load_csv_robust(file_path, max_attempts=5):
     """Carga CSV con múltiples estrategias para manejar errores de formato"""
 
-    strategies = [
-        {'engine': 'python'},
-        {'engine': 'python', 'on_bad_lines': 'skip'},
-        {'engine': 'python', 'on_bad_lines': 'skip', 'quoting': 3},
-        {'engine': 'python', 'on_bad_lines': 'skip', 'quoting': 3, 'escapechar': '\\'},
-        {'engine': 'c', 'on_bad_lines': 'skip', 'error_bad_lines': False}
-    ]
+    strategies = CSV_STRATEGIES
 
     for i, strategy in enumerate(strategies, 1):
+        count('csv_strategies_tried')
         try:
             print(f"Intentando estrategia {i} para cargar {os.path.basename(file_path)}...")
             df = pd.read_csv(file_path, **strategy)
@@ -26,8 +33,107 @@ def load_csv_robust(file_path, max_attempts=5):
 
     raise Exception("Todas las estrategias fallaron")
 
-def load_games_data(file_path):
-    """Carga el dataset de juegos"""
+# Líneas máximas de un registro entre comillas: más que esto es una comilla suelta
+MAX_RECORD_LINES = 1000
+
+def _iter_raw_chunks(file_path, chunksize):
+    """Lee el archivo en bloques de registros completos (respeta saltos de línea entre comillas)
+
+    Genera (encabezado, texto, corrupto). Si un registro sigue abierto tras
+    MAX_RECORD_LINES líneas se asume una comilla suelta: el bloque se
+    entrega marcado como corrupto y la lectura sigue en la línea
+    siguiente, así la memoria queda acotada a chunksize * MAX_RECORD_LINES
+    líneas.
+    """
+    with open(file_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        header = f.readline()
+        lines = []
+        quotes = 0
+        records = 0
+        record_lines = 0
+        for line in f:
+            lines.append(line)
+            quotes += line.count('"')
+            record_lines += 1
+            # Un registro termina cuando las comillas están balanceadas
+            if quotes % 2 == 0:
+                quotes = 0
+                record_lines = 0
+                records += 1
+                if records >= chunksize:
+                    yield header, ''.join(lines), False
+                    lines = []
+                    records = 0
+            elif record_lines >= MAX_RECORD_LINES:
+                count('csv_unbalanced_quotes')
+                yield header, ''.join(lines), True
+                lines = []
+                quotes = 0
+                records = 0
+                record_lines = 0
+        if lines:
+            # Al final del archivo con comillas abiertas también es un bloque corrupto
+            yield header, ''.join(lines), quotes % 2 == 1
+
+def _parse_chunk(header, text, columns, corrupt=False):
+    """Parsea un bloque con el motor C y reintenta solo ese bloque si falla
+
+    Los bloques corruptos (comillas sin cerrar) van directo a las
+    estrategias permisivas.
+    """
+    if corrupt:
+        print("❌ Bloque con comillas sin cerrar, usando estrategias permisivas")
+    else:
+        try:
+            df = pd.read_csv(io.StringIO(header + text), engine='c')
+            if columns is not None and list(df.columns) != columns:
+                raise ValueError("Columnas distintas a las del archivo")
+            return df, 0
+        except Exception as e:
+            print(f"❌ Bloque con errores ({str(e)[:80]}...), reintentando con estrategias permisivas")
+
+    count('csv_chunks_retried')
+    for i, strategy in enumerate(CSV_STRATEGIES[1:], 2):
+        count('csv_strategies_tried')
+        try:
+            df = pd.read_csv(io.StringIO(header + text), **strategy)
+            if columns is not None and list(df.columns) != columns:
+                raise ValueError("Columnas distintas a las del archivo")
+            return df, i
+        except Exception as e:
+            print(f"❌ Estrategia {i} falló en el bloque: {str(e)[:100]}...")
+
+    raise Exception("No se pudo cargar un bloque con ninguna estrategia")
+
+def iter_csv_robust(file_path, chunksize=100000):
+    """Carga un CSV grande por bloques con el motor C
+
+    Solo los bloques que fallan se reintentan con las estrategias
+    permisivas de load_csv_robust. Genera DataFrames de a un bloque para
+    que el archivo nunca tenga que estar completo en memoria.
+    """
+    print(f"Cargando {os.path.basename(file_path)} por bloques de {chunksize} filas...")
+
+    columns = None
+    total_rows = 0
+    retried_chunks = 0
+
+    for header, text, corrupt in _iter_raw_chunks(file_path, chunksize):
+        count('csv_chunks_read')
+        chunk, strategy = _parse_chunk(header, text, columns, corrupt)
+        if columns is None:
+            columns = list(chunk.columns)
+        if strategy:
+            retried_chunks += 1
+        total_rows += len(chunk)
+        yield chunk
+
+    print(f"✅ Carga por bloques completa: {total_rows} filas ({retried_chunks} bloques reintentados)")
+
+def load_games_data(file_path, chunksize=None):
+    """Carga el dataset de juegos (por bloques si se indica chunksize)"""
+    if chunksize:
+        return iter_csv_robust(file_path, chunksize)
     return load_csv_robust(file_path)
 
 def load_keywords_data(file_path):
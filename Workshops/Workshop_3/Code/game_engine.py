@@ -1,13 +1,18 @@
 import time
 import random
+import numpy as np
+from instrumentation import count
+from bots import QUESTION_BANK, sample_question_ids, answer_ids_batch
 
 class GameEngine:
     """Motor principal del juego"""
 
-    def __init__(self, max_rounds=20, time_limit=60):
+    def __init__(self, max_rounds=20, time_limit=60, rng=None, np_rng=None):
         self.max_rounds = max_rounds
         self.time_limit = time_limit
         self.games_played = 0
+        self.rng = rng or random  # Sorteos escalares (run_game)
+        self.np_rng = np_rng      # Generator de NumPy (run_games_batch)
 
     def run_game(self, questioner, answerer, keyword, category):
         """Ejecuta una partida completa"""
@@ -23,7 +28,7 @@ class GameEngine:
         }
 
         # Determinar número de rondas (variable para realismo)
-        max_rounds = random.randint(5, self.max_rounds)
+        max_rounds = self.rng.randint(5, self.max_rounds)
 
         for round_num in range(max_rounds):
             game_state['round'] = round_num
@@ -32,10 +37,12 @@ class GameEngine:
             question = questioner.generate_question(game_state)
 
             # Simular tiempo de procesamiento
-            processing_time = random.uniform(0.5, 3.0)
+            processing_time = self.rng.uniform(0.5, 3.0)
 
             # Verificar timeout
             if processing_time > self.time_limit:
+                count('games_timeout')
+                count('rounds_simulated', round_num + 1)
                 return {
                     'status': 'timeout',
                     'rounds': round_num + 1,
@@ -55,7 +62,7 @@ class GameEngine:
             guess_probability = base_probability + round_bonus + skill_bonus
             guess_probability = max(0.01, min(0.8, guess_probability))
 
-            if random.random() < guess_probability:
+            if self.rng.random() < guess_probability:
                 game_state['guessed'] = True
                 break
 
@@ -68,6 +75,8 @@ class GameEngine:
             winner = 'answerer'
 
         self.games_played += 1
+        count('games_played')
+        count('rounds_simulated', game_state['round'] + 1)
 
         return {
             'status': status,
@@ -76,3 +85,86 @@ class GameEngine:
             'winner': winner,
             'total_time': sum([h[2] for h in game_state['history']])
         }
+
+    def run_games_batch(self, questioners, answerers, keywords, categories,
+                        include_history=False, rng=None):
+        """Ejecuta N partidas a la vez con arreglos de NumPy
+
+        Reproduce las reglas de run_game (rondas variables, tiempo de
+        procesamiento, timeout y probabilidad de acierto) pero sorteando
+        todas las rondas de todas las partidas de una sola vez. Devuelve
+        el mismo esquema de resultados en forma columnar.
+        """
+        rng = np.random.default_rng(rng if rng is not None else self.np_rng)
+        n_games = len(questioners)
+        max_rounds = self.max_rounds
+
+        skill = np.fromiter((q.skill_mu for q in questioners), dtype=float, count=n_games)
+
+        # Sorteos de todas las partidas y rondas
+        game_rounds = rng.integers(5, max_rounds + 1, size=n_games)
+        processing_times = rng.uniform(0.5, 3.0, size=(n_games, max_rounds))
+        guess_draws = rng.random((n_games, max_rounds))
+
+        round_idx = np.arange(max_rounds)
+        active = round_idx[None, :] < game_rounds[:, None]
+
+        guess_probability = 0.05 + 0.03 * round_idx[None, :] + ((skill - 600) / 1000)[:, None]
+        guess_probability = np.clip(guess_probability, 0.01, 0.8)
+
+        # Máscaras de parada temprana (el timeout se revisa antes de adivinar)
+        timeout_mask = active & (processing_times > self.time_limit)
+        guess_mask = active & (guess_draws < guess_probability)
+
+        no_event = max_rounds
+        first_timeout = np.where(timeout_mask.any(axis=1), timeout_mask.argmax(axis=1), no_event)
+        first_guess = np.where(guess_mask.any(axis=1), guess_mask.argmax(axis=1), no_event)
+
+        timed_out = first_timeout <= first_guess
+        timed_out &= first_timeout < no_event
+        guessed = ~timed_out & (first_guess < no_event)
+
+        rounds = np.where(timed_out, first_timeout + 1,
+                          np.where(guessed, first_guess + 1, game_rounds))
+        # Rondas completadas (con respuesta registrada en el historial)
+        played = np.where(timed_out, first_timeout, rounds)
+        played_mask = round_idx[None, :] < played[:, None]
+        total_time = np.where(played_mask, processing_times, 0.0).sum(axis=1)
+        total_time[timed_out] = 0.0
+
+        status = np.where(timed_out, 'timeout', np.where(guessed, 'success', 'failure'))
+        winner = np.where(guessed, 'questioner', 'answerer')
+
+        self.games_played += int((~timed_out).sum())
+        count('games_played', int((~timed_out).sum()))
+        count('games_timeout', int(timed_out.sum()))
+        count('rounds_simulated', int(rounds.sum()))
+
+        results = {
+            'status': status,
+            'rounds': rounds,
+            'winner': winner,
+            'total_time': total_time,
+            'questions_asked': played
+        }
+
+        if include_history:
+            # Preguntas y respuestas por id, sin pasar por los métodos de los bots
+            question_ids = np.empty((n_games, max_rounds), dtype=np.int16)
+            strategies = np.array([getattr(q, 'strategy', 'adaptive') for q in questioners])
+            for strategy in np.unique(strategies):
+                games = np.flatnonzero(strategies == strategy)
+                question_ids[games] = sample_question_ids(strategy, len(games), max_rounds, rng)
+            consistency = [a.consistency for a in answerers]
+            answers = answer_ids_batch(question_ids, keywords, categories, consistency, rng)
+
+            history = []
+            for g in range(n_games):
+                history.append([
+                    (QUESTION_BANK[question_ids[g, r]], answers[g, r], processing_times[g, r])
+                    for r in range(played[g])
+                ])
+            results['question_ids'] = question_ids
+            results['history'] = history
+
+        return results
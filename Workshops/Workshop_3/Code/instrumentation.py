@@ -0,0 +1,135 @@
+import functools
+import json
+import time
+from collections import defaultdict
+
+# Desactivado por defecto: timer/count/timed solo revisan esta bandera
+ENABLED = False
+
+COUNTERS = defaultdict(int)
+TIMERS = defaultdict(lambda: [0.0, 0])  # nombre -> [segundos totales, llamadas]
+
+def enable(flag=True):
+    """Activa o desactiva la recolección de métricas"""
+    global ENABLED
+    ENABLED = flag
+
+def enabled():
+    return ENABLED
+
+def reset():
+    """Borra todos los contadores y tiempos"""
+    COUNTERS.clear()
+    TIMERS.clear()
+
+def count(name, n=1):
+    """Suma n al contador 'name'"""
+    if ENABLED:
+        COUNTERS[name] += n
+
+class _Timer:
+    """Context manager que acumula el tiempo de un bloque en TIMERS[name]"""
+
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        entry = TIMERS[self.name]
+        entry[0] += time.perf_counter() - self.start
+        entry[1] += 1
+        return False
+
+class _NullTimer:
+    """Timer vacío usado cuando las métricas están desactivadas"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    """Cronometra un bloque: with timer('etapa'): ..."""
+    return _Timer(name) if ENABLED else _NULL_TIMER
+
+def timed(name=None):
+    """Decorador que cronometra cada llamada de la función"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """Copia serializable de las métricas actuales"""
+    return {
+        'counters': dict(COUNTERS),
+        'timers': {name: {'seconds': seconds, 'calls': calls}
+                   for name, (seconds, calls) in TIMERS.items()}
+    }
+
+def merge(metrics):
+    """Suma métricas de otro proceso (resultado de snapshot())"""
+    for name, value in metrics['counters'].items():
+        COUNTERS[name] += value
+    for name, entry in metrics['timers'].items():
+        TIMERS[name][0] += entry['seconds']
+        TIMERS[name][1] += entry['calls']
+
+def _metric_name(name):
+    return ''.join(c if c.isalnum() else '_' for c in name).strip('_').lower()
+
+def export_json(path):
+    """Guarda las métricas en JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, indent=2)
+
+def export_prometheus(path, prefix='simulation'):
+    """Guarda las métricas en formato de texto de Prometheus"""
+    lines = []
+    for name, value in sorted(COUNTERS.items()):
+        metric = f"{prefix}_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+    # Cada familia de métricas va en un solo grupo de líneas
+    for metric, field, fmt in (('stage_seconds_total', 0, '.6f'), ('stage_calls_total', 1, 'd')):
+        if TIMERS:
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+        for name, entry in sorted(TIMERS.items()):
+            lines.append(f'{prefix}_{metric}{{stage="{name}"}} {entry[field]:{fmt}}')
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def export(path):
+    """Exporta según la extensión: .prom/.txt para Prometheus, JSON en otro caso"""
+    if path.endswith(('.prom', '.txt')):
+        export_prometheus(path)
+    else:
+        export_json(path)
+    print(f"📏 Métricas guardadas en '{path}'")
+
+def report():
+    """Imprime un resumen de tiempos por etapa y contadores"""
+    if TIMERS:
+        print("\n⏱️  TIEMPOS POR ETAPA:")
+        for name, (seconds, calls) in sorted(TIMERS.items(), key=lambda item: -item[1][0]):
+            print(f"   {name:<32} {seconds:9.3f}s  ({calls} llamadas)")
+    if COUNTERS:
+        print("🔢 CONTADORES:")
+        for name, value in sorted(COUNTERS.items()):
+            print(f"   {name:<32} {value}")
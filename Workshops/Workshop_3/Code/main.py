@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -5,12 +6,22 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from data_loader import load_games_data, load_keywords_data
-from preprocessing import clean_games_data
+from preprocessing import clean_games_data, clean_games_chunks
 from simulation import run_simulation
+from cache import cache_key, load_clean_cache, save_clean_cache
 from analysis import analyze_results
+from results_io import write_results
+import instrumentation
+import profiling
+from instrumentation import timer
+from profiling import stage
 
-def main():
-    """Función principal que ejecuta toda la simulación"""
+def main(resume=False):
+    """Función principal que ejecuta toda la simulación
+
+    Con resume=True la simulación continúa desde los checkpoints de
+    CHECKPOINT_DIR en lugar de empezar de cero.
+    """
 
     print("🚀 INICIANDO SIMULACIÓN DEL SISTEMA '20 QUESTIONS'")
     print("="*80)
@@ -18,16 +29,53 @@ def main():
     # Configuración de archivos
     GAMES_FILE = '../games_data.csv'
     KEYWORDS_FILE = '../keywords.csv'
+    GAMES_CHUNKSIZE = None  # p.ej. 200000 para cargar archivos grandes por bloques
+    CACHE_DIR = '../.simulation_cache'  # None para desactivar el cache
+    PREPROCESSING_WORKERS = None  # Procesos para limpiar datos (None = un solo proceso)
+    CHECKPOINT_DIR = '../.simulation_checkpoints'  # None para desactivar los checkpoints
+    CHECKPOINT_EVERY = 10000  # Juegos entre checkpoints de cada escenario
+    # Gráficos: fast=None elige el modo rápido según la cantidad de juegos
+    PLOT_OPTIONS = {'fast': None, 'dpi': 300, 'fmt': 'png'}
+    # Resultados por juego: 'parquet' o 'arrow' (directorio particionado por escenario) o 'csv'
+    RESULTS_FORMAT = 'parquet'
+    RESULTS_PATH = 'simulation_results_complete.csv' if RESULTS_FORMAT == 'csv' else 'simulation_results'
+    # Archivo de métricas (.json o .prom); vacío = instrumentación desactivada
+    METRICS_FILE = os.environ.get('SIMULATION_METRICS')
+
+    if METRICS_FILE:
+        instrumentation.enable()
 
     try:
-        # 1. Cargar datos
-        print("📁 Paso 1: Cargando datos...")
-        games_df = load_games_data(GAMES_FILE)
-        keywords_df = load_keywords_data(KEYWORDS_FILE)
-
-        # 2. Limpiar datos
-        print("🧹 Paso 2: Limpiando datos...")
-        df_clean, keyword_dict = clean_games_data(games_df, keywords_df)
+        # 1-2. Cargar datos limpios desde cache si las entradas no cambiaron
+        cached = None
+        if CACHE_DIR:
+            with timer('cache_lookup'):
+                key = cache_key(GAMES_FILE, KEYWORDS_FILE)
+                cached = load_clean_cache(CACHE_DIR, key)
+
+        if cached is not None:
+            print("📁 Pasos 1-2: Datos limpios tomados del cache")
+            df_clean, keyword_dict = cached
+        else:
+            # 1. Cargar datos
+            print("📁 Paso 1: Cargando datos...")
+            with timer('load_data'), stage('load_data'):
+                games_df = load_games_data(GAMES_FILE, chunksize=GAMES_CHUNKSIZE)
+                keywords_df = load_keywords_data(KEYWORDS_FILE)
+
+            # 2. Limpiar datos
+            print("🧹 Paso 2: Limpiando datos...")
+            with timer('clean_data'), stage('clean_data'):
+                if GAMES_CHUNKSIZE:
+                    df_clean, keyword_dict = clean_games_chunks(games_df, keywords_df,
+                                                                  num_workers=PREPROCESSING_WORKERS)
+                else:
+                    df_clean, keyword_dict = clean_games_data(games_df, keywords_df,
+                                                                num_workers=PREPROCESSING_WORKERS)
+
+            if CACHE_DIR and len(df_clean) > 0:
+                with timer('cache_save'):
+                    save_clean_cache(CACHE_DIR, key, df_clean, keyword_dict)
 
         if len(df_clean) == 0:
             print("❌ Error: No hay datos válidos para simular")
@@ -38,7 +86,13 @@ def main():
             'num_games': min(150, len(df_clean)),
             'num_questioners': 8,
             'num_answerers': 8,
-            'scenarios': ['balanced', 'chaotic', 'skilled']
+            'scenarios': ['balanced', 'chaotic', 'skilled'],
+            'seed': 42,
+            'online_analysis': False,  # True = solo agregados en línea, sin DataFrame por juego
+            'checkpoint_dir': CHECKPOINT_DIR,
+            'checkpoint_every': CHECKPOINT_EVERY,
+            'resume': resume,
+            'adaptive': False  # True = cada escenario se detiene al alcanzar la precisión (num_games = máximo)
         }
 
         print(f"⚙️  Configuración de simulación:")
@@ -47,7 +101,8 @@ def main():
 
         # 4. Ejecutar simulación
         print("\n🎮 Paso 3: Ejecutando simulación...")
-        results = run_simulation(df_clean, keyword_dict, simulation_config)
+        with stage('simulation'):
+            results = run_simulation(df_clean, keyword_dict, simulation_config)
 
         if len(results) == 0:
             print("❌ Error: No se generaron resultados")
@@ -55,19 +110,23 @@ def main():
 
         # 5. Analizar resultados
         print("\n📊 Paso 4: Analizando resultados...")
-        analysis_summary = analyze_results(results, save_plots=True)
+        with stage('analysis'):
+            analysis_summary = analyze_results(results, save_plots=True, **PLOT_OPTIONS)
 
-        # 6. Guardar resultados
-        results.to_csv('simulation_results_complete.csv', index=False)
-        print(f"\n💾 Resultados guardados en 'simulation_results_complete.csv'")
+        # 6. Guardar resultados (en modo en línea no hay resultados por juego)
+        if not simulation_config['online_analysis']:
+            with timer('save_results'), stage('save_results'):
+                results_path = write_results(results, RESULTS_PATH, RESULTS_FORMAT)
+            print(f"\n💾 Resultados guardados en '{results_path}'")
 
         # 7. Resumen final
         print("\n" + "="*80)
         print("🎉 SIMULACIÓN COMPLETADA EXITOSAMENTE")
         print("="*80)
         print("📋 Archivos generados:")
-        print("   📊 simulation_comprehensive_analysis.png - Gráficos de análisis")
-        print("   📄 simulation_results_complete.csv - Resultados detallados")
+        print(f"   📊 simulation_comprehensive_analysis.{PLOT_OPTIONS['fmt']} - Gráficos de análisis")
+        if not simulation_config['online_analysis']:
+            print(f"   📄 {results_path} - Resultados detallados")
 
         print(f"\n🏆 RESUMEN EJECUTIVO:")
         print(f"   🎮 Juegos simulados: {analysis_summary['total_games']}")
@@ -87,8 +146,46 @@ def main():
         traceback.print_exc()
         return None, None
 
+    finally:
+        # Exportar métricas también si la corrida falló
+        if METRICS_FILE:
+            instrumentation.report()
+            instrumentation.export(METRICS_FILE)
+
+def parse_args():
+    """Opciones de perfilado (también por variables de entorno SIMULATION_PROFILE*)"""
+    parser = argparse.ArgumentParser(description="Simulación del sistema '20 Questions'")
+    parser.add_argument('--resume', action='store_true',
+                        help='Continúa la simulación desde el último checkpoint')
+    parser.add_argument('--profile', nargs='?', const='both', choices=profiling.MODES,
+                        default=os.environ.get('SIMULATION_PROFILE') or None,
+                        help='Perfila la corrida con cProfile, muestreo de pila o ambos')
+    parser.add_argument('--profile-stages', default=os.environ.get('SIMULATION_PROFILE_STAGES', ''),
+                        help='Etapas separadas por coma (load_data, clean_data, simulation, '
+                             'analysis, save_results); vacío = toda la corrida')
+    parser.add_argument('--profile-output', default='simulation_profile',
+                        help='Prefijo de los archivos .pstats y .collapsed')
+    parser.add_argument('--profile-top', type=int, default=20,
+                        help='Funciones a mostrar en el resumen')
+    parser.add_argument('--profile-interval', type=float, default=0.005,
+                        help='Segundos entre muestras del perfilador por muestreo')
+    args = parser.parse_args()
+    # El valor por defecto viene del entorno y argparse no lo valida contra choices
+    if args.profile and args.profile not in profiling.MODES:
+        parser.error(f"SIMULATION_PROFILE={args.profile!r} no es válido "
+                     f"(opciones: {', '.join(profiling.MODES)})")
+    return args
+
 if __name__ == "__main__":
-    results, summary = main()
+    args = parse_args()
+    if args.profile:
+        stages = [name.strip() for name in args.profile_stages.split(',') if name.strip()]
+        profiling.configure(args.profile, stages or None, args.profile_output,
+                            args.profile_top, args.profile_interval)
+
+    with stage('main'):
+        results, summary = main(resume=args.resume)
+    profiling.finish()
 
     if results is not None:
         print("\n🔍 Análisis adicional disponible:")
@@ -1,10 +1,13 @@
+import bisect
 import random
+from instrumentation import count
 
 class Matchmaker:
     """Sistema de emparejamiento por habilidad"""
 
-    def __init__(self, skill_tolerance=100):
+    def __init__(self, skill_tolerance=100, rng=None):
         self.skill_tolerance = skill_tolerance
+        self.rng = rng or random
 
     def find_match(self, questioner_pool, answerer_pool):
         """Encuentra emparejamiento basado en habilidad similar"""
@@ -13,7 +16,7 @@ class Matchmaker:
             return None, None
 
         # Seleccionar questioner aleatorio
-        questioner = random.choice(questioner_pool)
+        questioner = self.rng.choice(questioner_pool)
 
         # Encontrar answerer con habilidad similar
         compatible_answerers = [
@@ -22,9 +25,144 @@ class Matchmaker:
         ]
 
         if compatible_answerers:
-            answerer = random.choice(compatible_answerers)
+            answerer = self.rng.choice(compatible_answerers)
         else:
             # Si no hay compatible, tomar el más cercano
+            count('matchmaking_fallback_nearest')
             answerer = min(answerer_pool, key=lambda a: abs(a.skill_mu - questioner.skill_mu))
 
         return questioner, answerer
+
+    def match_round(self, questioner_pool, answerer_pool, fill_unmatched=False):
+        """Empareja una ronda completa: cada bot juega como máximo una vez
+
+        Ordena ambos pools por skill_mu y los recorre con dos punteros,
+        emparejando solo dentro de skill_tolerance. Costo O(N log N).
+        Los bots sin pareja compatible quedan libres en esta ronda, salvo
+        con fill_unmatched, que los empareja en orden de habilidad (el
+        equivalente por lotes de tomar el más cercano en find_match).
+        """
+        if not questioner_pool or not answerer_pool:
+            return []
+
+        # Barajar antes del orden estable para romper empates al azar
+        questioners = self.rng.sample(list(questioner_pool), len(questioner_pool))
+        answerers = self.rng.sample(list(answerer_pool), len(answerer_pool))
+        questioners.sort(key=lambda q: q.skill_mu)
+        answerers.sort(key=lambda a: a.skill_mu)
+
+        pairs = []
+        unmatched_q = []
+        unmatched_a = []
+        i = j = 0
+        while i < len(questioners) and j < len(answerers):
+            q_skill = questioners[i].skill_mu
+            a_skill = answerers[j].skill_mu
+            if abs(a_skill - q_skill) <= self.skill_tolerance:
+                pairs.append((questioners[i], answerers[j]))
+                i += 1
+                j += 1
+            elif a_skill < q_skill:
+                unmatched_a.append(answerers[j])
+                j += 1  # Answerer demasiado débil para este y los siguientes
+            else:
+                unmatched_q.append(questioners[i])
+                i += 1  # Questioner demasiado débil para este y los siguientes
+
+        count('matchmaking_pairs_in_tolerance', len(pairs))
+        if fill_unmatched:
+            # Los sobrantes ya están ordenados: emparejar por posición
+            unmatched_q.extend(questioners[i:])
+            unmatched_a.extend(answerers[j:])
+            filled = min(len(unmatched_q), len(unmatched_a))
+            count('matchmaking_fallback_nearest', filled)
+            pairs.extend(zip(unmatched_q, unmatched_a))
+
+        # Orden aleatorio para no sesgar el procesamiento por habilidad
+        self.rng.shuffle(pairs)
+        return pairs
+
+class IndexedMatchmaker(Matchmaker):
+    """Emparejamiento con índice de answerers ordenado por habilidad
+
+    Mantiene los answerers ordenados por skill_mu y resuelve la ventana de
+    tolerancia y el más cercano con bisect, en O(log N) por juego. El índice
+    se actualiza de forma incremental con on_skills_updated, que se registra
+    como listener de ScoringSystem.
+    """
+
+    def __init__(self, skill_tolerance=100, rng=None):
+        super().__init__(skill_tolerance, rng)
+        self._pool = None
+        self._keys = []     # skill_mu ordenados
+        self._bots = []     # answerers en el mismo orden que _keys
+        self._indexed = {}  # id(bot) -> skill_mu con el que está indexado
+
+    def __setstate__(self, state):
+        # _indexed usa id(bot), que cambia al deserializar (checkpoints)
+        self.__dict__.update(state)
+        self._indexed = {id(bot): skill for bot, skill in zip(self._bots, self._keys)}
+
+    def build_index(self, answerer_pool):
+        """Construye el índice ordenado para un pool de answerers"""
+        ordered = sorted(answerer_pool, key=lambda a: a.skill_mu)
+        self._pool = answerer_pool
+        self._keys = [a.skill_mu for a in ordered]
+        self._bots = ordered
+        self._indexed = {id(a): a.skill_mu for a in ordered}
+
+    def _remove(self, bot, skill):
+        i = bisect.bisect_left(self._keys, skill)
+        while self._bots[i] is not bot:
+            i += 1
+        del self._keys[i]
+        del self._bots[i]
+
+    def _insert(self, bot):
+        i = bisect.bisect_right(self._keys, bot.skill_mu)
+        self._keys.insert(i, bot.skill_mu)
+        self._bots.insert(i, bot)
+        self._indexed[id(bot)] = bot.skill_mu
+
+    def on_skills_updated(self, questioner, answerer):
+        """Reubica al answerer en el índice si su habilidad cambió"""
+        skill = self._indexed.get(id(answerer))
+        if skill is not None and skill != answerer.skill_mu:
+            self._remove(answerer, skill)
+            self._insert(answerer)
+
+    def find_match(self, questioner_pool, answerer_pool):
+        """Encuentra emparejamiento basado en habilidad similar"""
+
+        if not questioner_pool or not answerer_pool:
+            return None, None
+
+        if answerer_pool is not self._pool or len(answerer_pool) != len(self._bots):
+            self.build_index(answerer_pool)
+
+        # Seleccionar questioner aleatorio
+        questioner = self.rng.choice(questioner_pool)
+        skill = questioner.skill_mu
+
+        # Ventana [skill - tolerancia, skill + tolerancia]
+        lo = bisect.bisect_left(self._keys, skill - self.skill_tolerance)
+        hi = bisect.bisect_right(self._keys, skill + self.skill_tolerance)
+
+        if hi > lo:
+            answerer = self._bots[lo + self.rng.randrange(hi - lo)]
+        else:
+            # Si no hay compatible, tomar el más cercano (vecinos de la posición)
+            count('matchmaking_fallback_nearest')
+            answerer = self._bots[self._nearest(lo, skill)]
+
+        return questioner, answerer
+
+    def _nearest(self, i, skill):
+        if i == 0:
+            return 0
+        if i == len(self._keys):
+            return i - 1
+        # En empate gana el de menor habilidad, como min() sobre el pool ordenado
+        if skill - self._keys[i - 1] <= self._keys[i] - skill:
+            return i - 1
+        return i
@@ -3,6 +3,12 @@ import numpy as np
 import re
 import ast
 import random
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import count, timed
+
+# Cambiar al modificar la salida de clean_games_data (invalida el cache)
+PREPROCESSING_VERSION = "1"
+
 def process_answers(answer_sequence):
     """Convierte secuencia de respuestas a formato binario"""
     if pd.isna(answer_sequence):
@@ -48,8 +54,121 @@ def process_questions(question_sequence):
     avg_length = np.mean([len(q.split()) for q in cleaned_questions]) if cleaned_questions else 0
     return cleaned_questions, avg_length
 
-def clean_games_data(games_df, keywords_df):
-    """Limpieza completa del dataset de juegos"""
+# Versiones compiladas de las expresiones de process_questions
+_LIST_CHARS = re.compile(r"['\[\]]")
+_NON_WORD = re.compile(r'[^\w\s\?]')
+_SPACES = re.compile(r'\s+')
+
+_BINARY_MAP = {
+    'yes': 1, 'y': 1, 'true': 1,
+    'no': 0, 'n': 0, 'false': 0,
+    'maybe': 0.5, 'possibly': 0.5, 'perhaps': 0.5
+}
+
+def _explode_sequences(sequences):
+    """Separa cada secuencia '[a, b]' en una fila por elemento (índice = posición de la fila)"""
+    items = pd.Series(sequences.to_numpy(dtype=object), dtype=object).astype(str)
+    items = items.str.replace(_LIST_CHARS, '', regex=True).str.split(',').explode()
+    return items.astype(object)
+
+def _collect(values, n_rows):
+    """Agrupa elementos por fila en listas (lista vacía para filas sin elementos)"""
+    # explode conserva el orden, así que los elementos de cada fila son contiguos
+    counts = np.bincount(values.index.to_numpy(dtype=np.int64), minlength=n_rows)
+    parts = np.split(values.to_numpy(dtype=object), np.cumsum(counts)[:-1])
+    return pd.Series([part.tolist() for part in parts], dtype=object)
+
+def process_answers_column(answers):
+    """Versión vectorizada de process_answers sobre una columna completa"""
+    n_rows = len(answers)
+    items = _explode_sequences(answers).str.strip().str.lower()
+    items = items[items.notna() & (items != '')]
+
+    codes = items.map(_BINARY_MAP).fillna(0).to_numpy(dtype=float)
+    # Conservar los mismos tipos que process_answers (int para 0/1, float para 0.5)
+    values = codes.astype(np.int64).astype(object)
+    values[codes == 0.5] = 0.5
+    values = pd.Series(values, index=items.index, dtype=object)
+
+    certainty = pd.Series(np.abs(codes - 0.5), index=items.index)
+    certainty = certainty.groupby(level=0).mean().reindex(range(n_rows), fill_value=0)
+
+    return _collect(values, n_rows), certainty.to_numpy()
+
+def process_questions_column(questions):
+    """Versión vectorizada de process_questions sobre una columna completa"""
+    n_rows = len(questions)
+    items = _explode_sequences(questions).str.strip()
+    items = items[items.notna() & (items != '')]
+
+    items = items.str.lower()
+    items = items.str.replace(_NON_WORD, '', regex=True)
+    items = items.str.replace(_SPACES, ' ', regex=True)
+    items = items.str.strip()
+
+    # Filtros de calidad
+    word_counts = items.str.split().str.len()
+    keep = (items.str.len() >= 5) & (word_counts >= 2)
+    items = items[keep]
+    word_counts = word_counts[keep].astype(float)
+
+    avg_length = word_counts.groupby(level=0).mean().reindex(range(n_rows), fill_value=0)
+
+    return _collect(items, n_rows), avg_length.to_numpy()
+
+def _process_partition(task):
+    """Procesa respuestas y preguntas de una partición (ejecutable en otro proceso)"""
+    games_df, vectorized = task
+    processed = pd.DataFrame(index=games_df.index)
+
+    if vectorized:
+        # Procesar columnas completas con operaciones .str y explode/groupby
+        answers_binary, answer_certainty = process_answers_column(games_df['answers'])
+        processed['answers_binary'] = answers_binary.to_numpy()
+        processed['answer_certainty'] = answer_certainty
+
+        questions_clean, avg_question_length = process_questions_column(games_df['questions'])
+        processed['questions_clean'] = questions_clean.to_numpy()
+        processed['avg_question_length'] = avg_question_length
+    else:
+        # Procesar respuestas
+        processed[['answers_binary', 'answer_certainty']] = games_df['answers'].apply(
+            lambda x: pd.Series(process_answers(x))
+        )
+
+        # Procesar preguntas
+        processed[['questions_clean', 'avg_question_length']] = games_df['questions'].apply(
+            lambda x: pd.Series(process_questions(x))
+        )
+
+    # Métricas adicionales
+    processed['num_answers'] = processed['answers_binary'].apply(len)
+    processed['num_questions'] = processed['questions_clean'].apply(len)
+    return processed
+
+def _process_parallel(games_df, vectorized, num_workers, partition_rows):
+    """Reparte las filas en particiones acotadas y las procesa en un pool de procesos"""
+    columns = games_df[['answers', 'questions']]
+    tasks = (
+        (columns.iloc[start:start + partition_rows], vectorized)
+        for start in range(0, len(columns), partition_rows)
+    )
+    num_partitions = -(-len(columns) // partition_rows)
+    print(f"Procesando {num_partitions} particiones con {num_workers} procesos")
+
+    # map conserva el orden de las particiones
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        parts = list(executor.map(_process_partition, tasks))
+    return pd.concat(parts)
+
+@timed('clean_games_data')
+def clean_games_data(games_df, keywords_df, vectorized=True, num_workers=None,
+                     partition_rows=200000):
+    """Limpieza completa del dataset de juegos
+
+    Con num_workers > 1 las columnas de respuestas y preguntas se procesan
+    en particiones de hasta partition_rows filas en un pool de procesos.
+    """
 
     print(f"Dataset original: {games_df.shape}")
 
@@ -64,19 +183,14 @@ def clean_games_data(games_df, keywords_df):
     games_df = games_df.dropna(subset=available_columns)
     print(f"Después de eliminar nulos: {len(games_df)} filas (-{initial_rows - len(games_df)})")
 
-    # Procesar respuestas
-    games_df[['answers_binary', 'answer_certainty']] = games_df['answers'].apply(
-        lambda x: pd.Series(process_answers(x))
-    )
-
-    # Procesar preguntas
-    games_df[['questions_clean', 'avg_question_length']] = games_df['questions'].apply(
-        lambda x: pd.Series(process_questions(x))
-    )
+    if num_workers and num_workers > 1 and len(games_df) > partition_rows:
+        processed = _process_parallel(games_df, vectorized, num_workers, partition_rows)
+    else:
+        processed = _process_partition((games_df[['answers', 'questions']], vectorized))
 
-    # Métricas adicionales
-    games_df['num_answers'] = games_df['answers_binary'].apply(len)
-    games_df['num_questions'] = games_df['questions_clean'].apply(len)
+    games_df = games_df.copy()
+    for column in processed.columns:
+        games_df[column] = processed[column].to_numpy()
     games_df['qa_ratio'] = games_df['num_answers'] / (games_df['num_questions'] + 1)
 
     # Normalizar palabras clave y agregar categorías
@@ -97,6 +211,24 @@ def clean_games_data(games_df, keywords_df):
     )
 
     games_df = games_df[quality_filter]
+    count('rows_cleaned', initial_rows)
+    count('rows_kept', len(games_df))
     print(f"Dataset final limpio: {games_df.shape}")
 
     return games_df, keyword_dict
+
+def clean_games_chunks(games_chunks, keywords_df, num_workers=None):
+    """Limpia un dataset cargado por bloques y une solo las filas válidas"""
+    cleaned = []
+    keyword_dict = dict(zip(keywords_df['keyword'], keywords_df['category']))
+
+    for chunk in games_chunks:
+        chunk_clean, keyword_dict = clean_games_data(chunk, keywords_df, num_workers=num_workers)
+        cleaned.append(chunk_clean)
+
+    if not cleaned:
+        return pd.DataFrame(), keyword_dict
+
+    games_df = pd.concat(cleaned, ignore_index=True)
+    print(f"Dataset limpio (todos los bloques): {games_df.shape}")
+    return games_df, keyword_dict
@@ -0,0 +1,155 @@
+import cProfile
+import io
+import pstats
+import sys
+import threading
+from collections import Counter
+
+# Modos: 'cprofile' (determinista), 'sample' (muestreo periódico de la pila) o 'both'
+MODES = ('cprofile', 'sample', 'both')
+
+# Configuración activa; None = perfilado desactivado
+_CONFIG = None
+_PROFILER = None
+_SAMPLER = None
+_DEPTH = 0
+
+class StackSampler:
+    """Muestrea periódicamente la pila del hilo principal desde otro hilo
+
+    Mucho menos costoso que cProfile: el programa corre a velocidad
+    normal y cada muestra solo recorre los frames activos. Las pilas se
+    guardan en formato 'collapsed' (func;func;func conteo) listo para
+    flamegraph.pl o speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.active = False
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != __file__:
+                    stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, samples in self.stacks.most_common():
+                f.write(f"{stack} {samples}\n")
+
+    def summary(self, top=20):
+        """Funciones con más muestras propias e incluidas"""
+        own, inclusive = Counter(), Counter()
+        for stack, samples in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += samples
+            for frame in set(frames):
+                inclusive[frame] += samples
+        total = sum(self.stacks.values()) or 1
+
+        lines = [f"   {'propias':>8} {'incluidas':>10}  función"]
+        for frame, samples in own.most_common(top):
+            lines.append(f"   {samples / total:8.1%} {inclusive[frame] / total:10.1%}  {frame}")
+        return '\n'.join(lines)
+
+def _short_path(path):
+    return path.replace('\\', '/').rsplit('/', 1)[-1]
+
+def configure(mode='cprofile', stages=None, output='simulation_profile', top=20, interval=0.005):
+    """Activa el perfilado
+
+    stages: nombres de etapas a perfilar (None = toda la corrida, etapa 'main').
+    Genera <output>.pstats (cProfile) y/o <output>.collapsed (muestreo).
+    """
+    global _CONFIG, _PROFILER, _SAMPLER
+    if mode not in MODES:
+        raise ValueError(f"Modo de perfilado desconocido: {mode}")
+
+    _CONFIG = {'mode': mode, 'stages': set(stages) if stages else None,
+               'output': output, 'top': top}
+    _PROFILER = cProfile.Profile() if mode in ('cprofile', 'both') else None
+    _SAMPLER = StackSampler(interval) if mode in ('sample', 'both') else None
+
+def enabled():
+    return _CONFIG is not None
+
+def _selected(name):
+    stages = _CONFIG['stages']
+    return name == 'main' if stages is None else name in stages
+
+class stage:
+    """Perfila un bloque si su etapa fue seleccionada: with stage('clean_data'): ...
+
+    Las etapas anidadas solo activan el perfilador una vez. Los procesos
+    del pool paralelo no se perfilan; usar parallel=False para verlos.
+    """
+
+    def __init__(self, name):
+        self.active = _CONFIG is not None and _selected(name)
+
+    def __enter__(self):
+        global _DEPTH
+        if self.active:
+            _DEPTH += 1
+            if _DEPTH == 1:
+                if _PROFILER is not None:
+                    _PROFILER.enable()
+                if _SAMPLER is not None:
+                    _SAMPLER.active = True
+        return self
+
+    def __exit__(self, *exc):
+        global _DEPTH
+        if self.active:
+            _DEPTH -= 1
+            if _DEPTH == 0:
+                if _PROFILER is not None:
+                    _PROFILER.disable()
+                if _SAMPLER is not None:
+                    _SAMPLER.active = False
+        return False
+
+def finish():
+    """Guarda los perfiles e imprime las funciones más costosas"""
+    global _CONFIG, _PROFILER, _SAMPLER
+    if _CONFIG is None:
+        return
+
+    output, top = _CONFIG['output'], _CONFIG['top']
+    if _PROFILER is not None:
+        _PROFILER.dump_stats(f"{output}.pstats")
+        stream = io.StringIO()
+        stats = pstats.Stats(_PROFILER, stream=stream).strip_dirs().sort_stats('cumulative')
+        stats.print_stats(top)
+        print(f"\n🔬 PERFIL cProfile (top {top} por tiempo acumulado):")
+        print(stream.getvalue().strip())
+        print(f"💾 Perfil guardado en '{output}.pstats'")
+
+    if _SAMPLER is not None:
+        _SAMPLER.stop()
+        _SAMPLER.write_collapsed(f"{output}.collapsed")
+        total = sum(_SAMPLER.stacks.values())
+        print(f"\n🔬 PERFIL POR MUESTREO ({total} muestras cada {_SAMPLER.interval * 1000:.0f} ms, "
+              f"top {top}):")
+        print(_SAMPLER.summary(top))
+        print(f"💾 Pilas guardadas en '{output}.collapsed' (formato flamegraph)")
+
+    _CONFIG = _PROFILER = _SAMPLER = None
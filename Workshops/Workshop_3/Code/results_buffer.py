@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+# Columnas de resultados: (nombre, tipo). 'category' se guarda como códigos enteros
+# (-1 = valor faltante, como en pd.Categorical)
+RESULT_COLUMNS = [
+    ('scenario', 'category'),
+    ('game_id', np.int64),
+    ('keyword', 'category'),
+    ('category', 'category'),
+    ('rounds', np.int64),
+    ('status', 'category'),
+    ('winner', 'category'),
+    ('total_time', np.float64),
+    ('q_id', 'category'),
+    ('a_id', 'category'),
+    ('q_mu', np.float64),
+    ('q_sigma', np.float64),
+    ('a_mu', np.float64),
+    ('a_sigma', np.float64),
+    ('questions_asked', np.int64)
+]
+
+class ResultsBuffer:
+    """Buffer columnar de resultados con arreglos preasignados que crecen por bloques"""
+
+    def __init__(self, chunk_size=65536):
+        self.chunk_size = chunk_size
+        self.size = 0
+        self.capacity = 0
+        self.columns = {}
+        self.categories = {}
+        for name, dtype in RESULT_COLUMNS:
+            if dtype == 'category':
+                # Códigos int32 + diccionario valor -> código
+                self.columns[name] = np.empty(0, dtype=np.int32)
+                self.categories[name] = {}
+            else:
+                self.columns[name] = np.empty(0, dtype=dtype)
+
+    def __len__(self):
+        return self.size
+
+    def _reserve(self, extra):
+        """Asegura capacidad para 'extra' filas adicionales"""
+        needed = self.size + extra
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity + self.chunk_size)
+        for name, array in self.columns.items():
+            grown = np.empty(new_capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.columns[name] = grown
+        self.capacity = new_capacity
+
+    def _code(self, name, value):
+        codes = self.categories[name]
+        code = codes.get(value)
+        if code is None:
+            # NaN/None no son categorías: todos comparten el código -1
+            if pd.isna(value):
+                return -1
+            code = codes[value] = len(codes)
+        return code
+
+    def _mapping(self, name, values):
+        """Códigos de values con un -1 al final, así el código -1 se conserva al remapear"""
+        return np.array([self._code(name, value) for value in values] + [-1], dtype=np.int32)
+
+    def append(self, **row):
+        """Agrega un juego (mismas claves que RESULT_COLUMNS)"""
+        self._reserve(1)
+        i = self.size
+        for name, dtype in RESULT_COLUMNS:
+            value = row[name]
+            if dtype == 'category':
+                value = self._code(name, value)
+            self.columns[name][i] = value
+        self.size += 1
+
+    def extend(self, columns):
+        """Agrega un bloque de juegos dado como diccionario de arreglos"""
+        n = len(columns['game_id'])
+        self._reserve(n)
+        start, end = self.size, self.size + n
+        for name, dtype in RESULT_COLUMNS:
+            values = columns[name]
+            if dtype == 'category':
+                if np.ndim(values) == 0:
+                    values = np.full(n, self._code(name, values), dtype=np.int32)
+                else:
+                    # factorize deja los faltantes en -1 (np.unique falla con NaN entre strings)
+                    inverse, uniques = pd.factorize(np.asarray(values, dtype=object), sort=True)
+                    values = self._mapping(name, uniques.tolist())[inverse]
+            self.columns[name][start:end] = values
+        self.size = end
+
+    def merge(self, other):
+        """Agrega otro buffer remapeando sus códigos categóricos"""
+        n = len(other)
+        self._reserve(n)
+        start, end = self.size, self.size + n
+        for name, dtype in RESULT_COLUMNS:
+            values = other.columns[name][:n]
+            if dtype == 'category':
+                values = self._mapping(name, other.categories[name])[values]
+            self.columns[name][start:end] = values
+        self.size = end
+
+    def extend_dataframe(self, df):
+        """Agrega un DataFrame de to_dataframe conservando el orden de sus categorías"""
+        n = len(df)
+        self._reserve(n)
+        start, end = self.size, self.size + n
+        for name, dtype in RESULT_COLUMNS:
+            if dtype == 'category':
+                values = self._mapping(name, df[name].cat.categories)[df[name].cat.codes.to_numpy()]
+            else:
+                values = df[name].to_numpy()
+            self.columns[name][start:end] = values
+        self.size = end
+
+    def to_dataframe(self, start=0):
+        """Convierte el buffer (desde la fila start) en DataFrame con columnas categóricas"""
+        data = {}
+        for name, dtype in RESULT_COLUMNS:
+            values = self.columns[name][start:self.size]
+            if dtype == 'category':
+                categories = list(self.categories[name])
+                data[name] = pd.Categorical.from_codes(values, categories=pd.Index(categories, dtype=object))
+            else:
+                data[name] = values.copy()
+        return pd.DataFrame(data)
@@ -0,0 +1,135 @@
+import os
+import shutil
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:  # pyarrow es opcional: sin él solo queda CSV
+    pa = None
+    ds = None
+
+from results_buffer import ResultsBuffer
+
+# Formatos: 'parquet' y 'arrow' (IPC/Feather) particionados por escenario, o un solo CSV
+FORMATS = ('parquet', 'arrow', 'csv')
+PARTITION_COLUMN = 'scenario'
+
+def _file_format(fmt, compression=None):
+    """Formato de pyarrow.dataset y sus opciones de escritura"""
+    if fmt == 'parquet':
+        file_format = ds.ParquetFileFormat()
+        # Columnas de texto con diccionario: cada valor distinto se guarda una vez
+        options = file_format.make_write_options(compression=compression or 'zstd', use_dictionary=True)
+    else:
+        file_format = ds.IpcFileFormat()
+        options = file_format.make_write_options(compression=compression or 'zstd')
+    return file_format, options
+
+def write_results(results, path, fmt='parquet', compression=None):
+    """Guarda los resultados (DataFrame o ResultsBuffer)
+
+    parquet/arrow escriben un directorio particionado por escenario
+    (path/scenario=balanced/...), con compresión y las columnas
+    categóricas como diccionario; csv escribe un solo archivo.
+    Devuelve la ruta escrita.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de resultados desconocido: {fmt}")
+    if isinstance(results, ResultsBuffer):
+        results = results.to_dataframe()
+
+    if fmt != 'csv' and ds is None:
+        print("⚠️  pyarrow no está instalado, guardando resultados en CSV")
+        fmt, path = 'csv', path + '.csv'
+
+    if fmt == 'csv':
+        results.to_csv(path, index=False)
+        return path
+
+    # Igual que to_csv, reemplaza los resultados anteriores (también escenarios que ya no están)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    table = pa.Table.from_pandas(results.reset_index(drop=True), preserve_index=False)
+    file_format, options = _file_format(fmt, compression)
+    # Una partición por escenario (en un barrido pueden ser miles de celdas)
+    partitions = max(1024, results[PARTITION_COLUMN].nunique())
+    ds.write_dataset(table, path, format=file_format, file_options=options,
+                     partitioning=[PARTITION_COLUMN], partitioning_flavor='hive',
+                     max_partitions=partitions)
+    return path
+
+def _detect_format(path):
+    if os.path.isfile(path):
+        return 'csv'
+    for _, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.parquet'):
+                return 'parquet'
+            if name.endswith(('.arrow', '.feather', '.ipc')):
+                return 'arrow'
+    raise FileNotFoundError(f"No hay resultados en {path}")
+
+def _filter_expression(filters):
+    """Convierte [(columna, op, valor), ...] (todas deben cumplirse) en una expresión de pyarrow"""
+    operators = {
+        '=': lambda field, value: field == value,
+        '==': lambda field, value: field == value,
+        '!=': lambda field, value: field != value,
+        '<': lambda field, value: field < value,
+        '<=': lambda field, value: field <= value,
+        '>': lambda field, value: field > value,
+        '>=': lambda field, value: field >= value,
+        'in': lambda field, value: field.isin(list(value)),
+        'not in': lambda field, value: ~field.isin(list(value))
+    }
+    expression = None
+    for column, op, value in filters:
+        condition = operators[op](ds.field(column), value)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def _filter_pandas(df, filters):
+    """Mismos filtros aplicados en pandas (lectura de CSV sin pyarrow)"""
+    for column, op, value in filters or []:
+        df = df.query(f"`{column}` {'==' if op == '=' else op} @value")
+    return df
+
+def open_results(path, fmt=None):
+    """Dataset de pyarrow sobre los resultados escritos con write_results"""
+    fmt = fmt or _detect_format(path)
+    if fmt == 'csv':
+        return ds.dataset(path, format='csv')
+    file_format = 'parquet' if fmt == 'parquet' else 'ipc'
+    # La columna de partición vuelve como diccionario (categórica en pandas)
+    partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+    return ds.dataset(path, format=file_format, partitioning=partitioning)
+
+def read_results(path, columns=None, filters=None, fmt=None):
+    """Lee los resultados leyendo solo las columnas pedidas
+
+    filters es una lista de (columna, operador, valor) o una expresión de
+    pyarrow; los filtros sobre 'scenario' descartan particiones completas y
+    los demás se evalúan con las estadísticas de cada archivo antes de
+    leerlo (predicate pushdown).
+    """
+    if ds is None:
+        return _filter_pandas(pd.read_csv(path, usecols=columns), filters)
+
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = _filter_expression(filters)
+    return open_results(path, fmt).to_table(columns=columns, filter=filters).to_pandas()
+
+def iter_results(path, columns=None, filters=None, fmt=None, batch_size=131072):
+    """Igual que read_results pero de a bloques de DataFrame (memoria acotada)"""
+    if ds is None:
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=batch_size):
+            yield _filter_pandas(chunk, filters)
+        return
+
+    if filters is not None and not isinstance(filters, ds.Expression):
+        filters = _filter_expression(filters)
+    dataset = open_results(path, fmt)
+    for batch in dataset.to_batches(columns=columns, filter=filters, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
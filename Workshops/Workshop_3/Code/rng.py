@@ -0,0 +1,40 @@
+import random
+import zlib
+import numpy as np
+
+def _stable_key(key):
+    """Convierte una clave (str o int) en un entero estable entre procesos"""
+    if isinstance(key, (int, np.integer)):
+        return int(key)
+    return zlib.crc32(str(key).encode('utf-8'))
+
+class RandomStreams:
+    """Árbol de flujos aleatorios independientes derivados de una sola semilla
+
+    Cada nodo se identifica por una ruta de claves (p.ej. escenario,
+    fragmento) y de él salen flujos con nombre: Generators de NumPy para
+    los caminos vectorizados y random.Random para los ciclos escalares
+    (mucho más rápido por sorteo individual). Misma semilla y misma ruta
+    producen siempre los mismos números, sin importar el proceso.
+    """
+
+    def __init__(self, seed=42, path=()):
+        self.seed = seed
+        self.path = tuple(path)
+
+    def child(self, *keys):
+        """Nodo hijo (p.ej. streams.child(scenario, shard))"""
+        return RandomStreams(self.seed, self.path + keys)
+
+    def seed_sequence(self, name):
+        spawn_key = tuple(_stable_key(k) for k in self.path + (name,))
+        return np.random.SeedSequence(self.seed, spawn_key=spawn_key)
+
+    def numpy(self, name):
+        """Generator de NumPy para el flujo 'name'"""
+        return np.random.Generator(np.random.PCG64(self.seed_sequence(name)))
+
+    def python(self, name):
+        """random.Random sembrado desde el mismo árbol para el flujo 'name'"""
+        state = self.seed_sequence(name).generate_state(4, dtype=np.uint64)
+        return random.Random(int.from_bytes(state.tobytes(), 'little'))
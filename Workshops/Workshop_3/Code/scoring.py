@@ -1,9 +1,160 @@
+import os
+import numpy as np
+import pandas as pd
+from instrumentation import count, timed
+
+HISTORY_RESULTS = ['answerer', 'questioner']
+
+class RatingHistory:
+    """Historial de ratings en arreglos tipados (~50 bytes por juego)
+
+    Con max_records se conserva solo una ventana circular de los últimos
+    juegos; con spill_path, cada vez que se llena el bloque en memoria se
+    agrega a un CSV en disco y se libera.
+    """
+
+    FLOAT_COLUMNS = ['q_mu_before', 'a_mu_before', 'q_mu_after', 'a_mu_after']
+
+    def __init__(self, max_records=None, spill_path=None, chunk_size=65536):
+        self.max_records = max_records
+        self.spill_path = spill_path
+        self.chunk_size = max_records or chunk_size
+        self.bot_ids = {}          # bot_id -> código
+        self.size = 0              # registros en memoria
+        self.start = 0             # inicio de la ventana circular
+        self.total_recorded = 0
+        self.columns = {}
+        self._allocate(self.chunk_size)
+
+    def _allocate(self, capacity):
+        old, self.columns = self.columns, {
+            'questioner_id': np.empty(capacity, dtype=np.int32),
+            'answerer_id': np.empty(capacity, dtype=np.int32),
+            **{name: np.empty(capacity, dtype=np.float64) for name in self.FLOAT_COLUMNS},
+            'result': np.empty(capacity, dtype=np.int8),
+            'rounds': np.empty(capacity, dtype=np.int16)
+        }
+        for name, values in old.items():
+            self.columns[name][:self.size] = values[:self.size]
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.size
+
+    def _code(self, bot_id):
+        code = self.bot_ids.get(bot_id)
+        if code is None:
+            code = self.bot_ids[bot_id] = len(self.bot_ids)
+        return code
+
+    def _codes(self, bot_ids):
+        """Códigos de un arreglo de ids: un _code por id distinto, no por juego"""
+        inverse, uniques = pd.factorize(np.asarray(bot_ids))
+        return np.array([self._code(b) for b in uniques.tolist()], dtype=np.int32)[inverse]
+
+    def _slots(self, n):
+        """Posiciones donde escribir n registros nuevos"""
+        if self.max_records:
+            slots = (self.start + self.size + np.arange(n)) % self.capacity
+            overflow = max(0, self.size + n - self.capacity)
+            self.start = (self.start + overflow) % self.capacity
+            self.size = min(self.capacity, self.size + n)
+            return slots
+        if self.size + n > self.capacity:
+            if self.spill_path and self.size:
+                self.spill()
+            if self.size + n > self.capacity:
+                self._allocate(max(self.size + n, self.capacity + self.chunk_size))
+        slots = np.arange(self.size, self.size + n)
+        self.size += n
+        return slots
+
+    def append(self, questioner_id, answerer_id, q_mu_before, a_mu_before,
+               q_mu_after, a_mu_after, result, rounds):
+        """Registra un juego"""
+        i = int(self._slots(1)[0])
+        columns = self.columns
+        columns['questioner_id'][i] = self._code(questioner_id)
+        columns['answerer_id'][i] = self._code(answerer_id)
+        columns['q_mu_before'][i] = q_mu_before
+        columns['a_mu_before'][i] = a_mu_before
+        columns['q_mu_after'][i] = q_mu_after
+        columns['a_mu_after'][i] = a_mu_after
+        columns['result'][i] = result == 'questioner'
+        columns['rounds'][i] = rounds
+        self.total_recorded += 1
+
+    def extend(self, questioner_ids, answerer_ids, q_mu_before, a_mu_before,
+               q_mu_after, a_mu_after, results, rounds):
+        """Registra un bloque de juegos dado como arreglos
+
+        results son los ganadores ('questioner'/'answerer') o un arreglo
+        booleano (True si ganó el questioner).
+        """
+        n = len(q_mu_before)
+        if self.max_records and n > self.capacity:
+            # Solo sobreviven los últimos max_records
+            skip = n - self.capacity
+            self.total_recorded += skip
+            questioner_ids, answerer_ids = questioner_ids[skip:], answerer_ids[skip:]
+            q_mu_before, a_mu_before = q_mu_before[skip:], a_mu_before[skip:]
+            q_mu_after, a_mu_after = q_mu_after[skip:], a_mu_after[skip:]
+            results, rounds = results[skip:], rounds[skip:]
+            n = self.capacity
+
+        slots = self._slots(n)
+        columns = self.columns
+        columns['questioner_id'][slots] = self._codes(questioner_ids)
+        columns['answerer_id'][slots] = self._codes(answerer_ids)
+        columns['q_mu_before'][slots] = q_mu_before
+        columns['a_mu_before'][slots] = a_mu_before
+        columns['q_mu_after'][slots] = q_mu_after
+        columns['a_mu_after'][slots] = a_mu_after
+        results = np.asarray(results)
+        columns['result'][slots] = results if results.dtype == bool else results == 'questioner'
+        columns['rounds'][slots] = rounds
+        self.total_recorded += n
+
+    def to_dataframe(self, include_spilled=False, start=0):
+        """Vista del historial como DataFrame (del más antiguo al más reciente)
+
+        start saltea los primeros registros en memoria: solo se copian los
+        siguientes (p.ej. los nuevos desde el último checkpoint).
+        """
+        order = (self.start + np.arange(start, self.size)) % self.capacity
+        ids = pd.Index(list(self.bot_ids), dtype=object)
+        data = {
+            'questioner_id': pd.Categorical.from_codes(self.columns['questioner_id'][order], categories=ids),
+            'answerer_id': pd.Categorical.from_codes(self.columns['answerer_id'][order], categories=ids),
+            **{name: self.columns[name][order] for name in self.FLOAT_COLUMNS},
+            'result': pd.Categorical.from_codes(self.columns['result'][order], categories=HISTORY_RESULTS),
+            'rounds': self.columns['rounds'][order]
+        }
+        df = pd.DataFrame(data)
+
+        if include_spilled and self.spill_path and os.path.exists(self.spill_path):
+            spilled = pd.read_csv(self.spill_path)
+            df = pd.concat([spilled, df.astype({'questioner_id': object, 'answerer_id': object,
+                                                'result': object})], ignore_index=True)
+        return df
+
+    def spill(self):
+        """Agrega el bloque en memoria al CSV de spill_path y lo libera"""
+        if not self.spill_path or self.size == 0:
+            return
+        df = self.to_dataframe()
+        df.to_csv(self.spill_path, mode='a', index=False,
+                  header=not os.path.exists(self.spill_path))
+        self.size = 0
+        self.start = 0
+
 class ScoringSystem:
     """Sistema de puntuación basado en ELO"""
 
-    def __init__(self, k_factor=32):
+    def __init__(self, k_factor=32, history_limit=None, history_spill_path=None):
         self.k_factor = k_factor
-        self.history = []
+        self.history = RatingHistory(max_records=history_limit, spill_path=history_spill_path)
+        self.listeners = []  # Funciones (questioner, answerer) llamadas tras cada actualización
 
     def update_skills(self, questioner, answerer, game_result):
         """Actualiza habilidades usando sistema ELO modificado"""
@@ -16,6 +167,10 @@ class ScoringSystem:
         else:
             q_score = 0.0
 
+        count('skill_updates')
+        q_mu_before = questioner.skill_mu
+        a_mu_before = answerer.skill_mu
+
         # Calcular expectativas
         q_expected = 1 / (1 + 10**((answerer.skill_mu - questioner.skill_mu) / 400))
         a_expected = 1 - q_expected
@@ -28,14 +183,125 @@ class ScoringSystem:
         questioner.skill_sigma = max(50, questioner.skill_sigma * 0.98)
         answerer.skill_sigma = max(50, answerer.skill_sigma * 0.98)
 
+        # Notificar cambios de habilidad (p.ej. índices de emparejamiento)
+        for listener in self.listeners:
+            listener(questioner, answerer)
+
         # Registrar en historial
-        self.history.append({
-            'questioner_id': questioner.bot_id,
-            'answerer_id': answerer.bot_id,
-            'q_mu_before': questioner.skill_mu - self.k_factor * (q_score - q_expected),
-            'a_mu_before': answerer.skill_mu - self.k_factor * ((1 - q_score) - a_expected),
-            'q_mu_after': questioner.skill_mu,
-            'a_mu_after': answerer.skill_mu,
-            'result': game_result['winner'],
-            'rounds': game_result['rounds']
-        })
+        self.history.append(questioner.bot_id, answerer.bot_id, q_mu_before, a_mu_before,
+                            questioner.skill_mu, answerer.skill_mu,
+                            game_result['winner'], game_result['rounds'])
+
+    @timed('ScoringSystem.update_skills_batch')
+    def update_skills_batch(self, q_mu, q_sigma, a_mu, a_sigma, q_idx, a_idx, q_scores,
+                            q_ids=None, a_ids=None, rounds=None, record_history=True):
+        """Actualiza habilidades de muchos juegos sobre tablas de ratings
+
+        q_mu/q_sigma y a_mu/a_sigma son arreglos por bot que se modifican en
+        el lugar; q_idx/a_idx indican los bots de cada juego y q_scores el
+        resultado (1.0 si ganó el questioner). Los juegos se agrupan en
+        segmentos consecutivos sin bots repetidos, de modo que cada segmento
+        se aplica de una vez con NumPy y el resultado coincide con aplicar
+        update_skills juego por juego. El historial se agrega en un solo
+        bloque (~10% del tiempo con 1M de juegos); record_history=False lo omite.
+        """
+        q_idx = np.asarray(q_idx, dtype=np.int64)
+        a_idx = np.asarray(a_idx, dtype=np.int64)
+        q_scores = np.asarray(q_scores, dtype=float)
+        n_games = len(q_idx)
+        count('skill_updates', n_games)
+
+        q_before = np.empty(n_games)
+        a_before = np.empty(n_games)
+        q_after = np.empty(n_games)
+        a_after = np.empty(n_games)
+
+        segments = _conflict_free_segments(q_idx, a_idx)
+        if n_games and n_games / len(segments) < 16:
+            # Pocos bots: los segmentos son cortos y conviene un ciclo escalar
+            self._update_sequential(q_mu, q_sigma, a_mu, a_sigma, q_idx, a_idx, q_scores,
+                                    q_before, a_before, q_after, a_after)
+            segments = []
+
+        for start, end in segments:
+            qi = q_idx[start:end]
+            ai = a_idx[start:end]
+            q_before[start:end] = q_mu[qi]
+            a_before[start:end] = a_mu[ai]
+
+            # Calcular expectativas
+            q_expected = 1 / (1 + 10.0 ** ((a_before[start:end] - q_before[start:end]) / 400))
+            a_expected = 1 - q_expected
+
+            # Actualizar habilidades
+            q_mu[qi] = q_before[start:end] + self.k_factor * (q_scores[start:end] - q_expected)
+            a_mu[ai] = a_before[start:end] + self.k_factor * ((1 - q_scores[start:end]) - a_expected)
+            q_after[start:end] = q_mu[qi]
+            a_after[start:end] = a_mu[ai]
+
+            # Reducir incertidumbre gradualmente
+            q_sigma[qi] = np.maximum(50, q_sigma[qi] * 0.98)
+            a_sigma[ai] = np.maximum(50, a_sigma[ai] * 0.98)
+
+        if record_history:
+            winners = q_scores == 1.0
+            q_ids = q_idx if q_ids is None else q_ids
+            a_ids = a_idx if a_ids is None else a_ids
+            rounds = np.zeros(n_games, dtype=np.int64) if rounds is None else rounds
+            self.history.extend(q_ids, a_ids, q_before, a_before, q_after, a_after, winners, rounds)
+
+        return {
+            'q_mu_before': q_before,
+            'a_mu_before': a_before,
+            'q_mu_after': q_after,
+            'a_mu_after': a_after
+        }
+
+    def _update_sequential(self, q_mu, q_sigma, a_mu, a_sigma, q_idx, a_idx, q_scores,
+                           q_before, a_before, q_after, a_after):
+        """Aplica los juegos uno a uno sobre listas de Python (mismas fórmulas que update_skills)"""
+        qm, qs, am, as_ = q_mu.tolist(), q_sigma.tolist(), a_mu.tolist(), a_sigma.tolist()
+        k = self.k_factor
+        qb, ab, qa, aa = [], [], [], []
+
+        for qi, ai, q_score in zip(q_idx.tolist(), a_idx.tolist(), q_scores.tolist()):
+            q_old, a_old = qm[qi], am[ai]
+            q_expected = 1 / (1 + 10**((a_old - q_old) / 400))
+            a_expected = 1 - q_expected
+            qm[qi] = q_old + k * (q_score - q_expected)
+            am[ai] = a_old + k * ((1 - q_score) - a_expected)
+            qs[qi] = max(50, qs[qi] * 0.98)
+            as_[ai] = max(50, as_[ai] * 0.98)
+            qb.append(q_old)
+            ab.append(a_old)
+            qa.append(qm[qi])
+            aa.append(am[ai])
+
+        q_mu[:], q_sigma[:], a_mu[:], a_sigma[:] = qm, qs, am, as_
+        q_before[:], a_before[:], q_after[:], a_after[:] = qb, ab, qa, aa
+
+def _previous_occurrence(idx):
+    """Para cada juego, posición del juego anterior con el mismo bot (-1 si no hay)"""
+    order = np.argsort(idx, kind='stable')
+    sorted_idx = idx[order]
+    previous = np.full(len(idx), -1, dtype=np.int64)
+    same = sorted_idx[1:] == sorted_idx[:-1]
+    previous[order[1:][same]] = order[:-1][same]
+    return previous
+
+def _conflict_free_segments(q_idx, a_idx):
+    """Divide los juegos en tramos consecutivos donde ningún bot se repite"""
+    if len(q_idx) == 0:
+        return []
+    conflict = np.maximum(_previous_occurrence(q_idx), _previous_occurrence(a_idx))
+
+    segments = []
+    start = 0
+    # Candidatos a corte: juegos cuyo bot ya apareció antes
+    candidates = np.flatnonzero(conflict >= 0)
+    for g, previous in zip(candidates.tolist(), conflict[candidates].tolist()):
+        if previous >= start:
+            segments.append((start, g))
+            start = g
+    segments.append((start, len(q_idx)))
+    return segments
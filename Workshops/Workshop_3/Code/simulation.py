@@ -1,10 +1,408 @@
-import pandas as pd
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from bots import QuestionerBot, AnswererBot
+from bots import QuestionerBot, AnswererBot, BotPopulation
 from game_engine import GameEngine
 from scoring import ScoringSystem
-from matchmaking import Matchmaker
+from matchmaking import Matchmaker, IndexedMatchmaker
+from results_buffer import ResultsBuffer
+from aggregates import OnlineAggregator
+from rng import RandomStreams
+from checkpoint import TaskCheckpoint, prepare_checkpoints
+from convergence import ConvergenceMonitor
+import instrumentation
+from instrumentation import count, timer, timed
 
+# Parámetros de un escenario. num_questioners/num_answerers en None toman los de config
+SCENARIO_DEFAULTS = {
+    'adaptive_share': 1.0,   # Fracción de questioners 'adaptive' (el resto son 'random')
+    'consistency': 0.8,      # Consistencia de los answerers
+    'skill_boost': 0,        # Habilidad extra de cada questioner, sorteada en [0, skill_boost]
+    'max_rounds': 20,        # GameEngine
+    'k_factor': 32,          # ScoringSystem
+    'skill_tolerance': 100,  # Matchmaker
+    'num_questioners': None,
+    'num_answerers': None
+}
+
+# Escenarios predefinidos: solo lo que cambia respecto de SCENARIO_DEFAULTS
+SCENARIOS = {
+    'balanced': {},
+    'chaotic': {'adaptive_share': 0.0, 'consistency': 0.5},
+    'skilled': {'consistency': 0.9, 'skill_boost': 200}  # Bots más hábiles
+}
+
+def scenario_params(config, scenario):
+    """Parámetros completos de un escenario
+
+    config['scenario_params'] puede definir escenarios nuevos o cambiar los
+    predefinidos ({nombre: {parámetro: valor}}).
+    """
+    custom = config.get('scenario_params') or {}
+    if scenario not in SCENARIOS and scenario not in custom:
+        raise ValueError(f"Escenario desconocido: {scenario}")
+    params = {**SCENARIO_DEFAULTS, **SCENARIOS.get(scenario, {}), **custom.get(scenario, {})}
+    params['num_questioners'] = params['num_questioners'] or config['num_questioners']
+    params['num_answerers'] = params['num_answerers'] or config['num_answerers']
+    return params
+
+def create_bots(scenario, config, streams):
+    """Crea las poblaciones de bots según el escenario"""
+    if config.get('compact_bots'):
+        return create_bot_populations(scenario, config, streams)
+
+    params = scenario_params(config, scenario)
+    q_rng = streams.python('questioners')
+    a_rng = streams.python('answerers')
+
+    num_adaptive = round(params['adaptive_share'] * params['num_questioners'])
+    questioners = [QuestionerBot(strategy="adaptive" if i < num_adaptive else "random", rng=q_rng)
+                   for i in range(params['num_questioners'])]
+    if params['skill_boost']:
+        for q in questioners:
+            q.skill_mu += q_rng.uniform(0, params['skill_boost'])
+    answerers = [AnswererBot(consistency=params['consistency'], rng=a_rng)
+                 for _ in range(params['num_answerers'])]
+    return questioners, answerers
+
+def create_bot_populations(scenario, config, streams):
+    """Igual que create_bots pero con poblaciones en arreglos (BotPopulation)"""
+    params = scenario_params(config, scenario)
+    q_rng = streams.python('questioners')
+    a_rng = streams.python('answerers')
+
+    num_adaptive = round(params['adaptive_share'] * params['num_questioners'])
+    questioners = BotPopulation('questioner', params['num_questioners'], strategy="adaptive", rng=q_rng)
+    questioners.strategy[num_adaptive:] = BotPopulation.STRATEGIES.index("random")
+    if params['skill_boost']:
+        questioners.skill_mu += [q_rng.uniform(0, params['skill_boost']) for _ in range(len(questioners))]
+    answerers = BotPopulation('answerer', params['num_answerers'], consistency=params['consistency'],
+                              rng=a_rng)
+    return questioners, answerers
+
+def shard_bot_ids(bots, shard):
+    """Agrega el fragmento a los ids (Q_1234 -> Q_<fragmento>_1234)
+
+    Cada fragmento sortea su propia población, así que sin esto bots
+    independientes de distintos fragmentos pueden compartir id.
+    """
+    bot_ids = [bot_id.replace('_', f'_{shard}_', 1) for bot_id in (bot.bot_id for bot in bots)]
+    if isinstance(bots, BotPopulation):
+        bots.bot_ids = bot_ids
+    else:
+        for bot, bot_id in zip(bots, bot_ids):
+            bot.bot_id = bot_id
+
+def create_systems(scenario, config, streams):
+    """Crea motor, puntaje y emparejamiento con sus propios flujos aleatorios"""
+    params = scenario_params(config, scenario)
+    engine = GameEngine(max_rounds=params['max_rounds'], rng=streams.python('engine'),
+                        np_rng=streams.numpy('engine'))
+    scoring = ScoringSystem(k_factor=params['k_factor'])
+    if config.get('indexed_matchmaking'):
+        matchmaker = IndexedMatchmaker(skill_tolerance=params['skill_tolerance'],
+                                       rng=streams.python('matchmaker'))
+        scoring.listeners.append(matchmaker.on_skills_updated)
+    else:
+        matchmaker = Matchmaker(skill_tolerance=params['skill_tolerance'],
+                                rng=streams.python('matchmaker'))
+    return engine, scoring, matchmaker
+
+def new_results(config):
+    """Destino de los resultados: buffer por juego o solo agregados en línea"""
+    return OnlineAggregator() if config.get('online_analysis') else ResultsBuffer()
+
+def scenario_streams(config, scenario, shard=0):
+    """Flujos aleatorios de un (escenario, fragmento) derivados de config['seed']"""
+    return RandomStreams(config.get('seed', 42)).child(scenario, shard)
+
+def task_checkpoint(config, scenario, shard=0):
+    """Checkpoints del (escenario, fragmento), o None si están desactivados"""
+    if not config.get('checkpoint_dir'):
+        return None
+    return TaskCheckpoint(config['checkpoint_dir'], scenario, shard, config['checkpoint_every'])
+
+def convergence_monitor(config):
+    """Monitor de convergencia del modo adaptativo, o None si está desactivado"""
+    if not config.get('adaptive'):
+        return None
+    return ConvergenceMonitor(config['target_precision'], config['confidence'],
+                              config['adaptive_batch'], config['adaptive_min_games'])
+
+def finish_adaptive(scenario, monitor, played, budget):
+    """Informa si el escenario se detuvo por precisión o por agotar el presupuesto"""
+    if monitor is None:
+        return
+    if monitor.converged:
+        count('adaptive_games_saved', budget - played)
+        print(f"🎯 Escenario {scenario}: precisión alcanzada en {played}/{budget} juegos "
+              f"({monitor.report()})")
+    else:
+        print(f"⚠️  Escenario {scenario}: presupuesto de {budget} juegos agotado sin alcanzar "
+              f"la precisión ({monitor.report()})")
+
+def start_scenario(config, scenario, streams, checkpoint=None, shard=0):
+    """Sistemas, resultados y posición inicial: nuevos o desde el último checkpoint"""
+    results = new_results(config)
+    state = checkpoint.load() if checkpoint else None
+    if state is not None:
+        results = checkpoint.restore(state, results)
+        print(f"♻️  Escenario {scenario}: reanudando en el juego {state['position']}")
+        return state['systems'], results, state['position'], state['done']
+
+    # Configurar bots según escenario
+    questioners, answerers = create_bots(scenario, config, streams)
+    if config.get('num_shards', 1) > 1:
+        shard_bot_ids(questioners, shard)
+        shard_bot_ids(answerers, shard)
+
+    # Inicializar sistemas
+    engine, scoring, matchmaker = create_systems(scenario, config, streams)
+    # El monitor va en systems para que los checkpoints también lo guarden
+    systems = {'questioners': questioners, 'answerers': answerers, 'engine': engine,
+               'scoring': scoring, 'matchmaker': matchmaker, 'monitor': convergence_monitor(config)}
+    return systems, results, 0, False
+
+def run_scenario(game_data, keyword_dict, config, scenario, game_ids=None, streams=None,
+                 checkpoint=None, shard=0):
+    """Ejecuta los juegos de un escenario con una población de bots propia"""
+    streams = streams or scenario_streams(config, scenario)
+    systems, scenario_results, start, done = start_scenario(config, scenario, streams, checkpoint, shard)
+    if done:
+        return scenario_results
+    questioners, answerers = systems['questioners'], systems['answerers']
+    engine, scoring, matchmaker = systems['engine'], systems['scoring'], systems['matchmaker']
+    monitor = systems['monitor']
+
+    if game_ids is None:
+        game_ids = range(len(game_data))
+
+    # Ejecutar juegos (desde 'start' si se reanuda)
+    end = len(game_data)
+    for i, game_id, (_, row) in zip(range(start, len(game_data)), game_ids[start:],
+                                    game_data.iloc[start:].iterrows()):
+        if i % 20 == 0:
+            print(f"Progreso: {i+1}/{len(game_data)}")
+
+        # Obtener palabra clave
+        keyword = row.get('keyword_clean', row.get('keyword', 'unknown'))
+        category = keyword_dict.get(keyword, 'unknown')
+
+        # Hacer emparejamiento
+        questioner, answerer = matchmaker.find_match(questioners, answerers)
+
+        if questioner and answerer:
+            # Ejecutar juego
+            game_result = engine.run_game(questioner, answerer, keyword, category)
+
+            # Actualizar habilidades
+            scoring.update_skills(questioner, answerer, game_result)
+
+            # Registrar resultado
+            scenario_results.append(
+                scenario=scenario,
+                game_id=game_id,
+                keyword=keyword,
+                category=category,
+                rounds=game_result['rounds'],
+                status=game_result['status'],
+                winner=game_result['winner'],
+                total_time=game_result.get('total_time', 0),
+                q_id=questioner.bot_id,
+                a_id=answerer.bot_id,
+                q_mu=questioner.skill_mu,
+                q_sigma=questioner.skill_sigma,
+                a_mu=answerer.skill_mu,
+                a_sigma=answerer.skill_sigma,
+                questions_asked=len(game_result['history'])
+            )
+            if monitor:
+                monitor.add(game_result['status'], game_result['rounds'])
+
+        # Modo adaptativo: detener al alcanzar la precisión pedida
+        if monitor and monitor.due() and monitor.check(questioners, answerers):
+            end = i + 1
+            break
+
+        if checkpoint and checkpoint.due(i + 1):
+            checkpoint.save(i + 1, systems, scenario_results)
+
+    finish_adaptive(scenario, monitor, end, len(game_data))
+    if checkpoint:
+        checkpoint.save(end, systems, scenario_results, done=True)
+    return scenario_results
+
+def run_scenario_batch(game_data, keyword_dict, config, scenario, game_ids=None, streams=None,
+                       checkpoint=None, shard=0):
+    """Ejecuta un escenario por rondas: emparejamiento, juegos y Elo en lote"""
+    streams = streams or scenario_streams(config, scenario)
+    systems, scenario_results, position, done = start_scenario(config, scenario, streams, checkpoint, shard)
+    if done:
+        return scenario_results
+    questioners, answerers = systems['questioners'], systems['answerers']
+    engine, scoring, matchmaker = systems['engine'], systems['scoring'], systems['matchmaker']
+    monitor = systems['monitor']
+
+    if game_ids is None:
+        game_ids = np.arange(len(game_data))
+    game_ids = np.asarray(game_ids)
+
+    # Tablas de ratings indexadas por posición del bot
+    q_index = {id(q): i for i, q in enumerate(questioners)}
+    a_index = {id(a): i for i, a in enumerate(answerers)}
+    q_mu = np.array([q.skill_mu for q in questioners], dtype=float)
+    q_sigma = np.array([q.skill_sigma for q in questioners], dtype=float)
+    a_mu = np.array([a.skill_mu for a in answerers], dtype=float)
+    a_sigma = np.array([a.skill_sigma for a in answerers], dtype=float)
+
+    if 'keyword_clean' in game_data.columns:
+        keywords = game_data['keyword_clean'].to_numpy(dtype=object)
+    else:
+        keywords = game_data['keyword'].to_numpy(dtype=object)
+    categories = np.array([keyword_dict.get(k, 'unknown') for k in keywords], dtype=object)
+
+    while position < len(game_data):
+        print(f"Progreso: {position+1}/{len(game_data)}")
+
+        pairs = matchmaker.match_round(questioners, answerers, fill_unmatched=True)
+        pairs = pairs[:len(game_data) - position]
+        if not pairs:
+            # Sin bots para emparejar: los juegos restantes se omiten, como en run_scenario
+            position = len(game_data)
+            break
+        tick = slice(position, position + len(pairs))
+        tick_q, tick_a = zip(*pairs)
+
+        results = engine.run_games_batch(tick_q, tick_a, keywords[tick], categories[tick])
+
+        qi = np.fromiter((q_index[id(q)] for q in tick_q), dtype=np.int64, count=len(pairs))
+        ai = np.fromiter((a_index[id(a)] for a in tick_a), dtype=np.int64, count=len(pairs))
+        q_ids = [q.bot_id for q in tick_q]
+        a_ids = [a.bot_id for a in tick_a]
+        q_scores = (results['winner'] == 'questioner').astype(float)
+        scoring.update_skills_batch(q_mu, q_sigma, a_mu, a_sigma, qi, ai, q_scores,
+                                    q_ids=q_ids, a_ids=a_ids, rounds=results['rounds'])
+
+        # Devolver ratings a los bots para la siguiente ronda de emparejamiento
+        for q, i in zip(tick_q, qi.tolist()):
+            q.skill_mu, q.skill_sigma = float(q_mu[i]), float(q_sigma[i])
+        for a, i in zip(tick_a, ai.tolist()):
+            a.skill_mu, a.skill_sigma = float(a_mu[i]), float(a_sigma[i])
+
+        scenario_results.extend({
+            'scenario': scenario,
+            'game_id': game_ids[tick],
+            'keyword': keywords[tick],
+            'category': categories[tick],
+            'rounds': results['rounds'],
+            'status': results['status'],
+            'winner': results['winner'],
+            'total_time': results['total_time'],
+            'q_id': np.array(q_ids, dtype=object),
+            'a_id': np.array(a_ids, dtype=object),
+            'q_mu': q_mu[qi],
+            'q_sigma': q_sigma[qi],
+            'a_mu': a_mu[ai],
+            'a_sigma': a_sigma[ai],
+            'questions_asked': results['questions_asked']
+        })
+        position += len(pairs)
+
+        # Modo adaptativo: detener al alcanzar la precisión pedida
+        if monitor:
+            monitor.add(results['status'], results['rounds'])
+            if monitor.due() and monitor.check(questioners, answerers):
+                break
+
+        if checkpoint and checkpoint.due(position):
+            checkpoint.save(position, systems, scenario_results)
+
+    finish_adaptive(scenario, monitor, position, len(game_data))
+    if checkpoint:
+        checkpoint.save(position, systems, scenario_results, done=True)
+    return scenario_results
+
+def _run_shard(task):
+    """Punto de entrada de cada proceso: siembra y ejecuta un fragmento"""
+    scenario, shard, game_data, game_ids, keyword_dict, config, metrics_enabled = task
+
+    # Métricas propias del proceso, devueltas al padre para sumarlas
+    instrumentation.enable(metrics_enabled)
+    instrumentation.reset()
+
+    # Flujos deterministas por (seed, escenario, fragmento)
+    streams = scenario_streams(config, scenario, shard)
+
+    runner = run_scenario_batch if config['batch_mode'] else run_scenario
+    with timer(f'scenario:{scenario}'):
+        results = runner(game_data, keyword_dict, config, scenario, game_ids, streams,
+                         task_checkpoint(config, scenario, shard), shard)
+    return scenario, shard, results, instrumentation.snapshot()
+
+def _build_tasks(data, keyword_dict, config):
+    """Divide cada escenario en fragmentos independientes"""
+    game_data = data.sample(n=min(config['num_games'], len(data)), random_state=config['seed'])
+    game_ids = np.arange(len(game_data))
+    num_shards = max(1, config['num_shards'])
+
+    if config['checkpoint_dir']:
+        prepare_checkpoints(config, game_data)
+
+    tasks = []
+    for scenario in config['scenarios']:
+        for shard, ids in enumerate(np.array_split(game_ids, num_shards)):
+            if len(ids) == 0:
+                continue
+            tasks.append((scenario, shard, game_data.iloc[ids], ids, keyword_dict, config,
+                          instrumentation.enabled()))
+    return tasks
+
+def run_simulation_parallel(data, keyword_dict, config):
+    """Ejecuta escenarios y fragmentos en un pool de procesos"""
+    tasks = _build_tasks(data, keyword_dict, config)
+    num_workers = config['num_workers'] or os.cpu_count()
+
+    print(f"Ejecutando {len(tasks)} tareas con {num_workers} procesos")
+
+    shard_results = {}
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        for scenario, shard, results, metrics in executor.map(_run_shard, tasks):
+            shard_results[(scenario, shard)] = results
+            instrumentation.merge(metrics)
+            print(f"Completado escenario {scenario} (fragmento {shard}): {len(results)} juegos")
+
+    # Unir en el orden de escenarios y fragmentos
+    all_results = new_results(config)
+    for scenario, shard, *_ in tasks:
+        all_results.merge(shard_results[(scenario, shard)])
+    return all_results
+
+# Configuración por defecto de run_simulation
+DEFAULT_CONFIG = {
+    'num_games': 100,
+    'num_questioners': 10,
+    'num_answerers': 10,
+    'scenarios': ['balanced', 'chaotic', 'skilled'],
+    'scenario_params': {},     # Escenarios nuevos o modificados (ver scenario_params)
+    'parallel': False,
+    'num_workers': None,
+    'num_shards': 1,
+    'seed': 42,
+    'indexed_matchmaking': False,
+    'batch_mode': False,
+    'compact_bots': False,
+    'online_analysis': False,
+    'checkpoint_dir': None,    # Directorio de checkpoints (None = sin checkpoints)
+    'checkpoint_every': 10000, # Juegos entre checkpoints de cada escenario/fragmento
+    'resume': False,           # Continuar desde los checkpoints existentes
+    'adaptive': False,         # Detener cada escenario al alcanzar la precisión (num_games = máximo)
+    'target_precision': None,  # Semiancho máximo por estadística (None = DEFAULT_TARGETS)
+    'confidence': 0.95,        # Nivel de confianza de los intervalos
+    'adaptive_batch': 50,      # Juegos entre revisiones de convergencia
+    'adaptive_min_games': 100  # Juegos mínimos antes de poder detenerse
+}
+
+@timed('run_simulation')
 def run_simulation(data, keyword_dict, config):
     """Ejecuta simulación completa con múltiples escenarios"""
 
@@ -13,83 +411,42 @@ def run_simulation(data, keyword_dict, config):
     print("="*60)
 
     # Configuración por defecto
-    default_config = {
-        'num_games': 100,
-        'num_questioners': 10,
-        'num_answerers': 10,
-        'scenarios': ['balanced', 'chaotic', 'skilled']
-    }
-    config = {**default_config, **config}
+    config = {**DEFAULT_CONFIG, **config}
+
+    # Con fragmentos cada uno tendría que alcanzar la precisión por su cuenta
+    # (num_shards veces más juegos): el modo adaptativo usa un fragmento por escenario
+    if config['adaptive'] and config['num_shards'] > 1:
+        print("⚠️  Modo adaptativo: se usa num_shards=1 (los escenarios siguen en paralelo)")
+        config['num_shards'] = 1
+
+    if config['parallel']:
+        return _finish(run_simulation_parallel(data, keyword_dict, config), config)
 
-    all_results = []
+    all_results = new_results(config)
+
+    # Seleccionar subset de datos
+    game_data = data.sample(n=min(config['num_games'], len(data)), random_state=config['seed'])
+    if config['checkpoint_dir']:
+        prepare_checkpoints(config, game_data)
 
     for scenario in config['scenarios']:
         print(f"\n{'-'*40}")
         print(f"EJECUTANDO ESCENARIO: {scenario.upper()}")
         print(f"{'-'*40}")
 
-        # Configurar bots según escenario
-        if scenario == 'balanced':
-            questioners = [QuestionerBot(strategy="adaptive") for _ in range(config['num_questioners'])]
-            answerers = [AnswererBot(consistency=0.8) for _ in range(config['num_answerers'])]
-        elif scenario == 'chaotic':
-            questioners = [QuestionerBot(strategy="random") for _ in range(config['num_questioners'])]
-            answerers = [AnswererBot(consistency=0.5) for _ in range(config['num_answerers'])]
-        else:  # skilled
-            questioners = [QuestionerBot(strategy="adaptive") for _ in range(config['num_questioners'])]
-            for q in questioners:
-                q.skill_mu += random.uniform(0, 200)  # Bots más hábiles
-            answerers = [AnswererBot(consistency=0.9) for _ in range(config['num_answerers'])]
-
-        # Inicializar sistemas
-        engine = GameEngine()
-        scoring = ScoringSystem()
-        matchmaker = Matchmaker()
-
-        # Ejecutar juegos
-        scenario_results = []
-
-        # Seleccionar subset de datos
-        game_data = data.sample(n=min(config['num_games'], len(data)), random_state=42)
-
-        for i, (_, row) in enumerate(game_data.iterrows()):
-            if i % 20 == 0:
-                print(f"Progreso: {i+1}/{len(game_data)}")
-
-            # Obtener palabra clave
-            keyword = row.get('keyword_clean', row.get('keyword', 'unknown'))
-            category = keyword_dict.get(keyword, 'unknown')
-
-            # Hacer emparejamiento
-            questioner, answerer = matchmaker.find_match(questioners, answerers)
-
-            if questioner and answerer:
-                # Ejecutar juego
-                game_result = engine.run_game(questioner, answerer, keyword, category)
-
-                # Actualizar habilidades
-                scoring.update_skills(questioner, answerer, game_result)
-
-                # Registrar resultado
-                scenario_results.append({
-                    'scenario': scenario,
-                    'game_id': i,
-                    'keyword': keyword,
-                    'category': category,
-                    'rounds': game_result['rounds'],
-                    'status': game_result['status'],
-                    'winner': game_result['winner'],
-                    'total_time': game_result.get('total_time', 0),
-                    'q_id': questioner.bot_id,
-                    'a_id': answerer.bot_id,
-                    'q_mu': questioner.skill_mu,
-                    'q_sigma': questioner.skill_sigma,
-                    'a_mu': answerer.skill_mu,
-                    'a_sigma': answerer.skill_sigma,
-                    'questions_asked': len(game_result['history'])
-                })
-
-        all_results.extend(scenario_results)
+        runner = run_scenario_batch if config['batch_mode'] else run_scenario
+        with timer(f'scenario:{scenario}'):
+            scenario_results = runner(game_data, keyword_dict, config, scenario,
+                                      checkpoint=task_checkpoint(config, scenario))
+
+        all_results.merge(scenario_results)
         print(f"Completado escenario {scenario}: {len(scenario_results)} juegos")
 
-    return pd.DataFrame(all_results)
+    return _finish(all_results, config)
+
+def _finish(all_results, config):
+    """DataFrame de resultados, o el OnlineAggregator si online_analysis está activo"""
+    if config['online_analysis']:
+        all_results.flush()
+        return all_results
+    return all_results.to_dataframe()
@@ -0,0 +1,228 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from data_loader import load_games_data, load_keywords_data
+from preprocessing import clean_games_data
+from cache import cache_key, frame_hash, load_clean_cache
+from results_buffer import RESULT_COLUMNS
+from results_io import write_results, read_results
+from aggregates import OnlineAggregator
+from simulation import (DEFAULT_CONFIG, SCENARIOS, SCENARIO_DEFAULTS, run_scenario,
+                        run_scenario_batch, scenario_streams)
+
+# Claves de la grilla: parámetros de escenario, escenario base y semilla
+GRID_KEYS = ('base', 'seed') + tuple(SCENARIO_DEFAULTS)
+# Claves de config que, además de los parámetros de la celda, cambian sus resultados
+RESULT_KEYS = ('num_games', 'batch_mode', 'indexed_matchmaking', 'compact_bots', 'adaptive',
+               'target_precision', 'confidence', 'adaptive_batch', 'adaptive_min_games')
+
+# Datos de juego de cada proceso del pool (se envían una sola vez, no por celda)
+_GAME_DATA = None
+_KEYWORD_DICT = None
+
+def expand_grid(grid, config=None):
+    """Celdas (parámetros completos + semilla) de una grilla, sin repetidos
+
+    grid es {parámetro: [valores]} o una lista de grillas que se unen.
+    'base' elige el escenario predefinido del que parte cada celda
+    (balanced por defecto) y 'seed' la semilla; los demás parámetros son
+    los de SCENARIO_DEFAULTS. Devuelve (celdas, cantidad de repetidas).
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    cells, seen, duplicates = [], set(), 0
+    for subgrid in (grid if isinstance(grid, list) else [grid]):
+        unknown = sorted(set(subgrid) - set(GRID_KEYS))
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos en la grilla: {unknown}")
+        names = list(subgrid)
+        values = [v if isinstance(v, (list, tuple)) else [v] for v in subgrid.values()]
+
+        for combination in itertools.product(*values):
+            choice = dict(zip(names, combination))
+            base = choice.pop('base', 'balanced')
+            if base not in SCENARIOS:
+                raise ValueError(f"Escenario base desconocido: {base}")
+            seed = choice.pop('seed', config['seed'])
+            params = {**SCENARIO_DEFAULTS, **SCENARIOS[base], **choice}
+            params['num_questioners'] = params['num_questioners'] or config['num_questioners']
+            params['num_answerers'] = params['num_answerers'] or config['num_answerers']
+
+            cell = {'params': params, 'seed': seed}
+            signature = json.dumps(cell, sort_keys=True)
+            if signature in seen:
+                duplicates += 1
+                continue
+            seen.add(signature)
+            cells.append(cell)
+    return cells, duplicates
+
+def _data_fingerprint(game_data, keyword_dict):
+    """Huella de los juegos sorteados y del diccionario de palabras clave"""
+    games = frame_hash(game_data)
+    # repr distingue tipos (NaN de 'nan', 1 de '1') y ordena aunque haya claves no str
+    items = sorted((repr(key), repr(value)) for key, value in keyword_dict.items())
+    keywords = hashlib.blake2b(repr(items).encode(), digest_size=8)
+    return f"{games}:{keywords.hexdigest()}"
+
+def cell_id(cell, config, fingerprint):
+    """Identificador estable de una celda: cambia si cambia algo que afecte sus resultados"""
+    key = {
+        'cell': cell,
+        'config': {k: config[k] for k in RESULT_KEYS},
+        'data': fingerprint
+    }
+    digest = hashlib.blake2b(json.dumps(key, sort_keys=True).encode(), digest_size=8)
+    return f"cell_{digest.hexdigest()}"
+
+def _record_path(cache_dir, name):
+    return os.path.join(cache_dir, f"{name}.json")
+
+def load_cell(cache_dir, name):
+    """Registro de una celda terminada (o None si no está en el cache)"""
+    path = _record_path(cache_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_cell(cache_dir, name, cell, results):
+    """Guarda resultados y resumen de la celda; el .json se escribe último y marca que terminó"""
+    path = write_results(results, os.path.join(cache_dir, name), 'parquet')
+    summary = OnlineAggregator.from_dataframe(results).summary()
+    record = {
+        'cell': name,
+        **cell['params'],
+        'seed': cell['seed'],
+        'games': summary['total_games'],
+        'success_rate': summary['success_rate'],
+        'avg_rounds': summary['avg_rounds'],
+        **summary['chaos_indicators'],
+        'path': os.path.relpath(path, cache_dir)
+    }
+    tmp = _record_path(cache_dir, name) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp, _record_path(cache_dir, name))
+    return record
+
+def _init_worker(game_data, keyword_dict):
+    global _GAME_DATA, _KEYWORD_DICT
+    _GAME_DATA, _KEYWORD_DICT = game_data, keyword_dict
+
+def _run_cell(job):
+    """Ejecuta una celda como un escenario propio y la guarda en el cache"""
+    name, cell, config, cache_dir = job
+    run_config = {**config, 'seed': cell['seed'], 'scenario_params': {name: cell['params']}}
+    streams = scenario_streams(run_config, name)
+
+    runner = run_scenario_batch if config['batch_mode'] else run_scenario
+    # El progreso de cada celda no aporta en un barrido de miles de celdas
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = runner(_GAME_DATA, _KEYWORD_DICT, run_config, name, streams=streams)
+    return _save_cell(cache_dir, name, cell, results.to_dataframe())
+
+def combine_results(cache_dir, cells):
+    """Un solo DataFrame con los resultados de las celdas ('scenario' = id de celda)"""
+    frames = [read_results(os.path.join(cache_dir, record['path'])) for record in cells.to_dict('records')]
+    if not frames:
+        return pd.DataFrame(columns=[name for name, _ in RESULT_COLUMNS])
+    results = pd.concat(frames, ignore_index=True)[[name for name, _ in RESULT_COLUMNS]]
+    for name, dtype in RESULT_COLUMNS:
+        if dtype == 'category':
+            results[name] = results[name].astype(str).astype('category')
+    return results
+
+def run_sweep(data, keyword_dict, grid, config=None, cache_dir='../.sweep_cache', num_workers=None,
+              combine=True):
+    """Barrido de parámetros: expande la grilla y ejecuta las celdas en un pool de procesos
+
+    Todas las celdas juegan los mismos num_games juegos sorteados de data.
+    Las celdas repetidas se ejecutan una vez y las ya terminadas en
+    cache_dir no se vuelven a ejecutar, así un barrido interrumpido
+    continúa donde quedó. Devuelve (resultados combinados o None,
+    tabla de celdas con parámetros y resumen, indexada por id de celda).
+    """
+    config = {**DEFAULT_CONFIG, **(config or {}), 'online_analysis': False, 'checkpoint_dir': None}
+    game_data = data.sample(n=min(config['num_games'], len(data)), random_state=config['seed'])
+    fingerprint = _data_fingerprint(game_data, keyword_dict)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    cells, duplicates = expand_grid(grid, config)
+    names = [cell_id(cell, config, fingerprint) for cell in cells]
+    records = {name: load_cell(cache_dir, name) for name in names}
+    pending = [(name, cell, config, cache_dir) for name, cell in zip(names, cells) if records[name] is None]
+
+    print(f"🧪 Barrido: {len(cells)} celdas ({duplicates} repetidas descartadas), "
+          f"{len(cells) - len(pending)} en cache, {len(pending)} por ejecutar")
+
+    num_workers = num_workers or os.cpu_count()
+    if num_workers == 1 or len(pending) <= 1:
+        _init_worker(game_data, keyword_dict)
+        completed = map(_run_cell, pending)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                       initargs=(game_data, keyword_dict))
+        completed = (future.result() for future in
+                     as_completed([executor.submit(_run_cell, job) for job in pending]))
+
+    try:
+        for done, record in enumerate(completed, 1):
+            records[record['cell']] = record
+            print(f"✅ Celda {done}/{len(pending)} {record['cell']}: {record['games']} juegos, "
+                  f"éxito {record['success_rate']:.2%}")
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    cells_table = pd.DataFrame([records[name] for name in names]).set_index('cell')
+    results = combine_results(cache_dir, cells_table) if combine else None
+    return results, cells_table
+
+def _load_data(games_file, keywords_file, clean_cache_dir):
+    """Datos limpios desde el cache de main.py o cargándolos y limpiándolos"""
+    cached = None
+    if clean_cache_dir:
+        cached = load_clean_cache(clean_cache_dir, cache_key(games_file, keywords_file))
+    if cached is not None:
+        return cached
+    return clean_games_data(load_games_data(games_file), load_keywords_data(keywords_file))
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de parámetros sobre grillas de escenarios")
+    parser.add_argument('grid', help='Archivo JSON con la grilla ({parámetro: [valores]} o lista de grillas)')
+    parser.add_argument('--games', type=int, default=150, help='Juegos por celda')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch', action='store_true', help='Usa run_scenario_batch')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--cache-dir', default='../.sweep_cache')
+    parser.add_argument('--output', default='sweep_results',
+                        help='Resultados combinados (particionados por celda)')
+    parser.add_argument('--games-file', default='../games_data.csv')
+    parser.add_argument('--keywords-file', default='../keywords.csv')
+    parser.add_argument('--clean-cache-dir', default='../.simulation_cache')
+    args = parser.parse_args()
+
+    with open(args.grid, 'r', encoding='utf-8') as f:
+        grid = json.load(f)
+    data, keyword_dict = _load_data(args.games_file, args.keywords_file, args.clean_cache_dir)
+
+    config = {'num_games': args.games, 'seed': args.seed, 'batch_mode': args.batch}
+    results, cells = run_sweep(data, keyword_dict, grid, config, args.cache_dir, args.workers)
+
+    results_path = write_results(results, args.output, 'parquet')
+    cells.to_csv(args.output + '_cells.csv')
+    print(f"\n💾 Resultados en '{results_path}', resumen por celda en '{args.output}_cells.csv'")
+    # Mejores celdas, mostrando solo los parámetros que varían en la grilla
+    varying = [name for name in GRID_KEYS if name in cells and cells[name].nunique() > 1]
+    print(cells.sort_values('success_rate', ascending=False).head(10)
+          [varying + ['games', 'success_rate', 'avg_rounds', 'rounds_std']].to_string())
+
+if __name__ == "__main__":
+    main()
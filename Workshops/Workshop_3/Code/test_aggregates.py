@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from aggregates import OnlineAggregator
+
+def test_missing_keys_are_dropped_like_groupby():
+    rng = np.random.default_rng(0)
+    n = 200
+    # Un 20% de escenarios y categorías faltantes (celdas vacías en los datos)
+    missing = rng.random((2, n)) < 0.2
+    df = pd.DataFrame({
+        'scenario': np.where(missing[0], None, rng.choice(['balanced', 'chaotic'], n)),
+        'category': pd.Categorical(np.where(missing[1], np.nan, rng.choice(['things', 'place'], n).astype(object))),
+        'status': rng.choice(['success', 'failure'], n),
+        'rounds': rng.integers(1, 20, n),
+        'total_time': rng.random(n),
+        'q_mu': rng.normal(1500, 50, n),
+        'a_mu': rng.normal(1500, 50, n),
+        'q_sigma': rng.random(n),
+        'questions_asked': rng.integers(1, 20, n)
+    })
+
+    aggregates = OnlineAggregator.from_dataframe(df)
+    summary = aggregates.summary()
+
+    assert summary['total_games'] == n
+    for name, table in (('scenario', aggregates.scenarios), ('category', aggregates.categories)):
+        expected = df.groupby(name, observed=True)['rounds'].agg(['count', 'sum'])
+        assert sorted(table) == sorted(expected.index)
+        for key, entry in table.items():
+            assert entry[0] == expected.loc[key, 'count']
+            assert entry[2] == expected.loc[key, 'sum']
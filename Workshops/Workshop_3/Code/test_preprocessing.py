@@ -0,0 +1,74 @@
+import random
+import numpy as np
+import pandas as pd
+import pytest
+from preprocessing import (process_answers, process_questions, process_answers_column,
+                           process_questions_column, _process_partition)
+
+DERIVED_COLUMNS = ['answers_binary', 'answer_certainty', 'questions_clean',
+                   'avg_question_length', 'num_answers', 'num_questions']
+
+ANSWER_WORDS = ['yes', 'no', 'maybe', 'y', 'n', 'True', 'FALSE', 'possibly', 'perhaps',
+                'unknown', ' Yes ', '', 'sí', "'no'"]
+QUESTION_WORDS = ['Is it alive?', 'is it BIG', 'Is it electronic!', 'can you hold it',
+                  'is it made of metal?', 'x', 'does it have   moving parts', 'ab cd',
+                  '¿Es un animal?', 'it', 'what_is it', '  ', 'IS IT??  big']
+
+EDGE_CASES = [
+    np.nan, None, '', '[]', '[ ]', "['']", '[,]', ',,,', 'yes', "['yes'",
+    "yes']", '[[yes]]', "['yes', 'no', 'maybe']", "['yes',, 'no']", '["yes", "no"]',
+    "['Is it alive?', 'x', 'is it BIG']", "[np.str_('yes'), np.str_('no')]",
+    '[1, 2, 3]', 'nan', 'None', '\n', "['a\\nb', 'c d e']"
+]
+
+def _random_sequences(words, n, seed):
+    rng = random.Random(seed)
+    return [str([rng.choice(words) for _ in range(rng.randint(0, 12))]) for _ in range(n)]
+
+def _assert_same_lists(vectorized, expected):
+    assert len(vectorized) == len(expected)
+    for got, want in zip(vectorized, expected):
+        assert got == want
+        # Mismos tipos de elementos (int para 0/1, float para 0.5)
+        assert [type(v) for v in got] == [type(v) for v in want]
+
+@pytest.mark.parametrize('answers', [
+    _random_sequences(ANSWER_WORDS, 500, seed=0),
+    EDGE_CASES
+])
+def test_process_answers_column_matches_process_answers(answers):
+    binary, certainty = process_answers_column(pd.Series(answers, dtype=object))
+    expected = [process_answers(a) for a in answers]
+
+    _assert_same_lists(binary, [b for b, _ in expected])
+    np.testing.assert_allclose(certainty, [c for _, c in expected])
+
+@pytest.mark.parametrize('questions', [
+    _random_sequences(QUESTION_WORDS, 500, seed=1),
+    EDGE_CASES
+])
+def test_process_questions_column_matches_process_questions(questions):
+    cleaned, avg_length = process_questions_column(pd.Series(questions, dtype=object))
+    expected = [process_questions(q) for q in questions]
+
+    _assert_same_lists(cleaned, [q for q, _ in expected])
+    np.testing.assert_allclose(avg_length, [a for _, a in expected])
+
+def test_vectorized_partition_matches_rowwise():
+    n = 300
+    answers = _random_sequences(ANSWER_WORDS, n, seed=2) + EDGE_CASES
+    questions = _random_sequences(QUESTION_WORDS, n, seed=3) + EDGE_CASES[::-1]
+    # Índice no consecutivo, como después de filtrar filas
+    games_df = pd.DataFrame({'answers': answers, 'questions': questions},
+                            index=np.arange(len(answers)) * 3 + 7)
+
+    vectorized = _process_partition((games_df, True))
+    rowwise = _process_partition((games_df, False))
+
+    assert list(vectorized.index) == list(rowwise.index)
+    for name in DERIVED_COLUMNS:
+        got, want = vectorized[name].tolist(), rowwise[name].tolist()
+        if name in ('answers_binary', 'questions_clean'):
+            _assert_same_lists(got, want)
+        else:
+            np.testing.assert_allclose(np.asarray(got, dtype=float), np.asarray(want, dtype=float))
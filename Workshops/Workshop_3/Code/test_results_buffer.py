@@ -0,0 +1,36 @@
+import numpy as np
+from results_buffer import ResultsBuffer
+
+def _row(game_id, category):
+    return {
+        'scenario': 'balanced', 'game_id': game_id, 'keyword': f"kw{game_id}",
+        'category': category, 'rounds': 3, 'status': 'success', 'winner': 'questioner',
+        'total_time': 1.5, 'q_id': 'Q_1', 'a_id': 'A_1', 'q_mu': 1500.0, 'q_sigma': 350.0,
+        'a_mu': 1500.0, 'a_sigma': 350.0, 'questions_asked': 3
+    }
+
+def test_missing_category_round_trips_as_nan():
+    buffer = ResultsBuffer()
+    buffer.append(**_row(0, 'things'))
+    buffer.append(**_row(1, float('nan')))
+    buffer.append(**_row(2, None))
+    rows = [_row(i, c) for i, c in enumerate([np.nan, 'place', float('nan'), 'things'], 3)]
+    buffer.extend({name: np.array([row[name] for row in rows], dtype=object) for name in rows[0]})
+
+    df = buffer.to_dataframe()
+
+    # Los faltantes no son categorías y todos quedan como NaN
+    assert list(df['category'].cat.categories) == ['things', 'place']
+    assert df['category'].isna().tolist() == [False, True, True, True, False, True, False]
+    assert df['category'].dropna().tolist() == ['things', 'place', 'things']
+
+    # Conservan el -1 al copiarlos a otro buffer con sus propios códigos
+    merged, reloaded = ResultsBuffer(), ResultsBuffer()
+    for other in (merged, reloaded):
+        other.append(**_row(99, 'other'))
+    merged.merge(buffer)
+    reloaded.extend_dataframe(df)
+    for other in (merged, reloaded):
+        copied = other.to_dataframe(start=1)['category']
+        assert copied.isna().tolist() == df['category'].isna().tolist()
+        assert copied.dropna().tolist() == df['category'].dropna().tolist()
@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from scoring import ScoringSystem
+
+def _bots(prefix, n, rng):
+    return [SimpleNamespace(bot_id=f"{prefix}_{i}", skill_mu=float(mu), skill_sigma=float(sigma))
+            for i, (mu, sigma) in enumerate(zip(rng.normal(1500, 200, n), rng.uniform(40, 350, n)))]
+
+# Muchos bots (segmentos vectorizados) y pocos bots (ciclo escalar)
+@pytest.mark.parametrize('num_bots', [500, 3])
+def test_batch_matches_sequential_updates(num_bots):
+    rng = np.random.default_rng(num_bots)
+    n = 2000
+    questioners, answerers = _bots('Q', num_bots, rng), _bots('A', num_bots, rng)
+    q_idx = rng.integers(0, num_bots, n)
+    a_idx = rng.integers(0, num_bots, n)
+    q_scores = (rng.random(n) < 0.5).astype(float)
+    rounds = rng.integers(1, 20, n)
+
+    q_mu = np.array([q.skill_mu for q in questioners])
+    q_sigma = np.array([q.skill_sigma for q in questioners])
+    a_mu = np.array([a.skill_mu for a in answerers])
+    a_sigma = np.array([a.skill_sigma for a in answerers])
+    batch = ScoringSystem()
+    batch.update_skills_batch(q_mu, q_sigma, a_mu, a_sigma, q_idx, a_idx, q_scores,
+                              q_ids=[questioners[i].bot_id for i in q_idx],
+                              a_ids=[answerers[i].bot_id for i in a_idx], rounds=rounds)
+
+    sequential = ScoringSystem()
+    for qi, ai, score, r in zip(q_idx, a_idx, q_scores, rounds):
+        winner = 'questioner' if score == 1.0 else 'answerer'
+        sequential.update_skills(questioners[qi], answerers[ai],
+                                 {'winner': winner, 'status': 'success', 'rounds': r})
+
+    np.testing.assert_allclose(q_mu, [q.skill_mu for q in questioners], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(a_mu, [a.skill_mu for a in answerers], rtol=0, atol=1e-9)
+    np.testing.assert_array_equal(q_sigma, [q.skill_sigma for q in questioners])
+    np.testing.assert_array_equal(a_sigma, [a.skill_sigma for a in answerers])
+    # Mismo historial (los códigos de los ids pueden asignarse en otro orden)
+    pd.testing.assert_frame_equal(batch.history.to_dataframe(), sequential.history.to_dataframe(),
+                                  check_categorical=False, rtol=0, atol=1e-9)